@@ -1,14 +1,31 @@
+from typing import Dict, Iterator
+
+from contextlib import contextmanager
 import os
+import threading
 from dotenv import load_dotenv
 
+from sqlalchemy import event
 from sqlalchemy.engine import URL
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.engine import Engine
-from sqlalchemy.pool import NullPool
+from sqlalchemy.pool import QueuePool
+
+# One engine (with its pool of connections) & one sessionmaker per database URL in a process
+_engines: Dict[URL, Engine] = {}
+_session_makers: Dict[URL, sessionmaker] = {}
+_connection_stats: Dict[URL, Dict[str, int]] = {}
+_registry_lock = threading.Lock()
+_registry_pid = os.getpid()
 
 
 class DBConnector:
+    POOL_SIZE: int = 5
+    MAX_OVERFLOW: int = 10
+    # The server or a proxy may drop the idle connections - the older ones are replaced before they are used
+    POOL_RECYCLE_SECONDS: int = 1800
+
     db_drivername: str
     db_username: str
     db_password: str
@@ -26,17 +43,81 @@ class DBConnector:
         self.db_port = int(os.getenv("DB_PORT"))
         self.db_name = os.getenv("DB_NAME")
 
-    def create_sql_engine(self) -> Engine:
-        url_object = URL.create(
+    def get_url(self) -> URL:
+        return URL.create(
             drivername=self.db_drivername, username=self.db_username,
             password=self.db_password, host=self.db_host,
             port=self.db_port, database=self.db_name
         )
 
-        return create_engine(url_object, poolclass=NullPool, future=True)
+    def create_sql_engine(self) -> Engine:
+        """
+        :return: the engine shared by the whole process for the database. It keeps a bounded pool of the connections, so
+        the connecting & the authentication happen once per connection, not once per operation. A connection is checked
+        ('pre-ping') before it is taken from the pool.
+        """
+        global _registry_pid
+        url_object = self.get_url()
+
+        with _registry_lock:
+            if _registry_pid != os.getpid():
+                # A forked process must not use the connections of its parent
+                for engine in _engines.values():
+                    engine.dispose(close=False)
+                _engines.clear()
+                _session_makers.clear()
+                _connection_stats.clear()
+                _registry_pid = os.getpid()
+
+            if url_object not in _engines:
+                engine = create_engine(
+                    url_object, poolclass=QueuePool, pool_size=self.POOL_SIZE, max_overflow=self.MAX_OVERFLOW,
+                    pool_pre_ping=True, pool_recycle=self.POOL_RECYCLE_SECONDS, future=True
+                )
+                self._count_connections(engine, _connection_stats.setdefault(url_object, {'opened': 0, 'checkouts': 0}))
+                _engines[url_object] = engine
+                _session_makers[url_object] = sessionmaker(bind=engine)
+
+            return _engines[url_object]
+
+    @staticmethod
+    def _count_connections(engine: Engine, stats: Dict[str, int]) -> None:
+        def on_connect(dbapi_connection, connection_record):
+            stats['opened'] += 1
+
+        def on_checkout(dbapi_connection, connection_record, connection_proxy):
+            stats['checkouts'] += 1
+
+        event.listen(engine, 'connect', on_connect)
+        event.listen(engine, 'checkout', on_checkout)
 
     def create_session(self) -> Session:
-        my_session = sessionmaker(bind=self.create_sql_engine())
-        session = my_session()
+        """:return: a new session of the shared engine - it has to be closed (or use 'session_scope')."""
+        self.create_sql_engine()
+        return _session_makers[self.get_url()]()
+
+    @contextmanager
+    def session_scope(self) -> Iterator[Session]:
+        """A session that is committed when the block succeeds, rolled back when it fails & closed in both cases."""
+        session = self.create_session()
+        try:
+            yield session
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    def connection_stats(self) -> Dict[str, int]:
+        """
+        :return: the number of the connections opened to the database by this process & the number of the times the
+        connections were taken from the pool again (reused) instead.
+        """
+        self.create_sql_engine()
+        stats = _connection_stats[self.get_url()]
+        return {'opened': stats['opened'], 'reused': stats['checkouts'] - stats['opened']}
 
-        return session
+    def report_connection_stats(self) -> None:
+        stats = self.connection_stats()
+        print(f"Database connections opened: {stats['opened']}, reused from the pool: {stats['reused']}")
@@ -0,0 +1,54 @@
+from typing import Any, Iterable, List, Sequence
+
+from datetime import date, datetime
+import io
+
+import pandas as pd
+
+
+def encode_copy_value(value: Any) -> str:
+    """Encode a single value in the PostgreSQL COPY text format."""
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return '\\N'
+    if isinstance(value, float) and value.is_integer():
+        # The integer columns come from pandas as floats, but COPY (unlike INSERT) does not cast '3.0' into an integer
+        return str(int(value))
+    if isinstance(value, datetime):
+        return value.isoformat(sep=' ')
+    if isinstance(value, date):
+        return value.isoformat()
+
+    return (str(value)
+            .replace('\\', '\\\\')
+            .replace('\t', '\\t')
+            .replace('\n', '\\n')
+            .replace('\r', '\\r'))
+
+
+def copy_rows(dbapi_connection: Any, table_name: str, columns: List[str], rows: Iterable[Sequence[Any]]) -> int:
+    """
+    Load the rows into the table with one 'COPY ... FROM STDIN' statement. The transaction is not committed - it's up
+    to the caller.
+
+    :param dbapi_connection: a raw DBAPI (pg8000) connection, e.g. the one returned by 'Engine.raw_connection()'.
+    :param table_name: a name of the table the rows are loaded into.
+    :param columns: the column names, in the order of the values in the rows.
+    :param rows: the rows to load.
+    :return: the number of loaded rows.
+    """
+    buffer = io.StringIO()
+    hm_rows = 0
+    for row in rows:
+        buffer.write('\t'.join(encode_copy_value(value) for value in row))
+        buffer.write('\n')
+        hm_rows += 1
+    buffer.seek(0)
+
+    column_list = ', '.join(f'"{column}"' for column in columns)
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute(f'COPY {table_name} ({column_list}) FROM STDIN', stream=buffer)
+    finally:
+        cursor.close()
+
+    return hm_rows
@@ -1,6 +1,7 @@
 from dataclasses import dataclass
 
-from sqlalchemy import DATE, JSON, CheckConstraint, Column, Float, Integer, String, Sequence, ForeignKey, TEXT
+from sqlalchemy import BigInteger, DATE, JSON, CheckConstraint, Column, Float, Integer, String, Sequence, ForeignKey, \
+    TEXT
 from sqlalchemy.dialects.postgresql import BYTEA
 from sqlalchemy.ext.declarative import declarative_base
 
@@ -22,6 +23,7 @@ class DataStaging(Base):
     location = Column(String)
     desc = Column(String)
     image_url = Column(String)
+    ingest_id = Column(BigInteger)
 
 
 @dataclass
@@ -38,6 +40,7 @@ class DataStagingCols:
     LOCATION: str = "location"
     DESC: str = "desc"
     IMAGE_URL = "image_url"
+    INGEST_ID: str = "ingest_id"
 
 
 class DataMain(Base):
@@ -99,6 +102,37 @@ class DataMainCols:
     RUN_ID: str = "run_id"
 
 
+class DataPriceHistory(Base):
+    __tablename__ = "data_price_history"
+
+    id = Column(BigInteger, primary_key=True)
+    url = Column(String, ForeignKey('data_main.url', ondelete='CASCADE'), nullable=False)
+    price = Column(Float)
+    currency = Column(String(10))
+    rooms = Column(Integer)
+    floor = Column(Integer)
+    location = Column(String(30))
+    row_hash = Column(String(64))
+    last_time_seen = Column(DATE)
+    changed_date = Column(DATE)
+    run_id = Column(String)
+
+
+@dataclass
+class DataPriceHistoryCols:
+    ID: str = "id"
+    URL: str = "url"
+    PRICE: str = "price"
+    CURRENCY: str = "currency"
+    ROOMS: str = "rooms"
+    FLOOR: str = "floor"
+    LOCATION: str = "location"
+    ROW_HASH: str = "row_hash"
+    LAST_TIME_SEEN: str = "last_time_seen"
+    CHANGED_DATE: str = "changed_date"
+    RUN_ID: str = "run_id"
+
+
 class Models(Base):
     __tablename__ = "models"
 
@@ -42,12 +42,10 @@ def load_opportunities_data(_dbconn, _engine):
 
 
 def add_bargainletter_info_to_db(_dbconn, email, max_real_price, min_potential_gain, location):
-    session = _dbconn.create_session()
     email_obj = BargainletterEmails(email=email, max_real_price=max_real_price,
                                     min_potential_gain=min_potential_gain / 100, location=location)
-    session.add(email_obj)
-    session.commit()
-    session.close()
+    with _dbconn.session_scope() as session:
+        session.add(email_obj)
 
 
 @st.cache_resource
@@ -0,0 +1,97 @@
+"""
+Times the row hashing of MetadataCreator (the 'compat', the 'normalized' & the 'fast' mode) against the row-wise 'apply'
+of the reference & checks that the 'compat' hashes are the ones the reference gives. Run from the root of the
+repository:
+
+    python -m benchmarks.row_hash_benchmark [rows ...]
+
+The reference is slow (about 3s per 10k rows), so it is timed only up to REFERENCE_MAX_ROWS rows.
+"""
+from typing import Callable
+
+import sys
+import time
+import warnings
+
+import pandas as pd
+
+from _common.database_communicator.tables import DataStagingCols
+from benchmarks.reference_metadata_creator import MetadataCreator as ReferenceMetadataCreator
+from benchmarks.reference_transformer import DataTransformer as ReferenceTransformer
+from benchmarks.staging_frames import generate_staging_frame
+from crawler.data_cleaner.data_transformer import DataTransformer
+from crawler.data_cleaner.metadata_creator import MetadataCreator
+
+DEFAULT_ROWS = [10_000, 100_000, 1_000_000]
+REFERENCE_MAX_ROWS = 100_000
+
+
+def time_once(func: Callable[[], pd.Series]) -> float:
+    start_time = time.perf_counter()
+    func()
+    return time.perf_counter() - start_time
+
+
+def metadata_creator(mode: str) -> MetadataCreator:
+    creator = MetadataCreator()
+    creator.ROW_HASH_MODE = mode
+    return creator
+
+
+def count_same_compat_hashes(staging_data: pd.DataFrame) -> int:
+    """The reference hashes the output of the reference transformer, like the stored hashes were made."""
+    reference_data = ReferenceTransformer().transform_data(staging_data.copy())
+    reference_hashes = reference_data.apply(ReferenceMetadataCreator()._create_row_hash, axis=1)
+
+    data = DataTransformer().transform_data(staging_data.copy())
+    compat_hashes = metadata_creator(MetadataCreator.ROW_HASH_COMPAT).create_row_hashes(data)
+    return (compat_hashes == reference_hashes).sum()
+
+
+def check_compat_parity() -> None:
+    """
+    The dtypes of the hashed columns depend on the batch, so the parity is checked on the batches of every kind - the
+    floors are ints only when none of them is missing & a column missing in the whole batch holds None.
+    """
+    no_missing_floors = generate_staging_frame(200, seed=1)
+    no_missing_floors[DataStagingCols.FLOOR] = ['2/4', 'parter/3', ' 3 / 10 ', '-1/2'] * 50
+
+    all_missing = generate_staging_frame(200, seed=2)
+    all_missing[[DataStagingCols.PRICE, DataStagingCols.FLOOR, DataStagingCols.LOCATION]] = None
+
+    for name, staging_data in [('mixed', generate_staging_frame(200, seed=0)), ('no missing floor', no_missing_floors),
+                               ('all-missing price, floor & location', all_missing)]:
+        same_hashes = count_same_compat_hashes(staging_data)
+        hm_rows = len(DataTransformer().transform_data(staging_data.copy()))
+        print(f"The same compat hashes in the {name} batch: {same_hashes} of {hm_rows}")
+        assert same_hashes == hm_rows
+
+
+def benchmark(rows: int) -> None:
+    staging_data = generate_staging_frame(rows, seed=rows)
+    data = DataTransformer().transform_data(staging_data.copy())
+
+    compat_time = time_once(lambda: metadata_creator(MetadataCreator.ROW_HASH_COMPAT).create_row_hashes(data))
+    normalized_time = time_once(
+        lambda: metadata_creator(MetadataCreator.ROW_HASH_NORMALIZED).create_row_hashes(data)
+    )
+    fast_time = time_once(lambda: metadata_creator(MetadataCreator.ROW_HASH_FAST).create_row_hashes(data))
+    print(f"{rows} rows: compat {compat_time:.2f}s, normalized {normalized_time:.2f}s, fast {fast_time:.2f}s")
+    if rows > REFERENCE_MAX_ROWS:
+        return
+
+    reference_data = ReferenceTransformer().transform_data(staging_data.copy())
+    reference_time = time_once(lambda: reference_data.apply(ReferenceMetadataCreator()._create_row_hash, axis=1))
+    print(f"    reference apply {reference_time:.2f}s; the same compat hashes: "
+          f"{count_same_compat_hashes(staging_data)} of {len(data)}")
+
+
+def main() -> None:
+    warnings.simplefilter('ignore', FutureWarning)
+    check_compat_parity()
+    for rows in [int(rows) for rows in sys.argv[1:]] or DEFAULT_ROWS:
+        benchmark(rows)
+
+
+if __name__ == '__main__':
+    main()
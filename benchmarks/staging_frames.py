@@ -0,0 +1,72 @@
+"""
+Synthetic frames of the staging table for the benchmarks & the equivalence checks. The values mimic the scraped ones,
+including the edge cases the cleaning has to handle ('brak informacji', 'zapytaj', the links, the whitespace). The URLs
+& the descriptions are unique per row & the prices & the sizes have thousands of distinct values, like the real data.
+"""
+from typing import Union
+
+import random
+
+import pandas as pd
+
+from _common.database_communicator.tables import DataStagingCols
+
+SPECIAL_PRICES = ['Zapytaj o cenę', 'cena', '12,5 tys', '', None, 'Ogłoszenie nie istnieje', 'Nie istnieje']
+CURRENCIES = [' zł', ' zł ', ' €', ' PLN', 'zł']
+SPECIAL_SIZES = ['1', '0,75', None, 'brak', '12.5', 'Brak informacji']
+FLOORS = ['2/4', 'parter/3', 'poddasze/5', 'suterena/2', ' 3 / 10 ', '1000/99', 'Brak informacji', 'zapytaj', 'Zapytaj',
+          None, '-1/2', '10/100', '5']
+PROPERTY_TYPES = ['Blok', 'Dom wolnostojący', 'kamienica', 'Apartamentowiec', 'plomba', 'Pozostałe', 'szeregowiec',
+                  'bliźniak', 'Brak informacji', None, 'loft', 'Dom w bloku']
+LOCATIONS = ['ul. Głogowska, Łazarz, Poznań', 'Jeżyce, Poznań', 'Poznań, Stare Miasto', 'Winogrady, Naramowice',
+             'Luboń', 'Suchy Las, poznański', 'Poznań', None, 'Rataje', 'Podolany']
+STATUSES = ['Wtórny', 'pierwotny', 'Brak informacji', None, ' Rynek WTÓRNY ']
+ROOMS = ['3', '1', '10', 'Brak informacji', None]
+YEARS_BUILT = ['1990', '2020', 'Brak informacji', None]
+PROPERTY_CONDITIONS = ['Do zamieszkania', 'do wykończenia', 'zapytaj', 'Brak informacji', None]
+DESCRIPTIONS = ['Ładne  Mieszkanie {} ', 'see http://x/{}', None, 'WWW.x{}.pl', 'Sprzedam dom, działka {} m²']
+IMAGE_URLS = ['https://img/{}.jpg', None, 'Img']
+
+COLUMNS = [DataStagingCols.URL, DataStagingCols.PRICE, DataStagingCols.STATUS, DataStagingCols.SIZE,
+           DataStagingCols.PROPERTY_TYPE, DataStagingCols.ROOMS, DataStagingCols.FLOOR, DataStagingCols.YEAR_BUILT,
+           DataStagingCols.PROPERTY_CONDITION, DataStagingCols.LOCATION, DataStagingCols.DESC,
+           DataStagingCols.IMAGE_URL]
+
+
+def generate_price(rng: random.Random) -> str:
+    if rng.random() < 0.1:
+        return rng.choice(SPECIAL_PRICES)
+
+    price = f'{rng.randrange(150, 3000) * 1000:,}'.replace(',', rng.choice([' ', '\xa0', '']))
+    return price + rng.choice(CURRENCIES)
+
+
+def generate_size(rng: random.Random) -> str:
+    if rng.random() < 0.1:
+        return rng.choice(SPECIAL_SIZES)
+
+    return f'{rng.randrange(200, 2500) / 10}'.replace('.', ',').replace(',0', '') + rng.choice(['', ' m²', ' m² '])
+
+
+def format_or_none(template: Union[str, None], row: int) -> Union[str, None]:
+    return None if template is None else template.format(row)
+
+
+def generate_staging_frame(rows: int, seed: int = 0) -> pd.DataFrame:
+    """
+    :param rows: the number of the rows.
+    :param seed: the seed of the random values - the same seed gives the same frame.
+    :return: a frame with the columns of the staging table; about 1% of the URLs are scraped twice.
+    """
+    rng = random.Random(seed)
+    records = []
+    for row in range(rows):
+        url_id = row if rng.random() > 0.01 else rng.randrange(rows)
+        records.append([
+            f'https://www.otodom.pl/pl/oferta/offer-{seed}-{url_id}', generate_price(rng), rng.choice(STATUSES),
+            generate_size(rng), rng.choice(PROPERTY_TYPES), rng.choice(ROOMS), rng.choice(FLOORS),
+            rng.choice(YEARS_BUILT), rng.choice(PROPERTY_CONDITIONS), rng.choice(LOCATIONS),
+            format_or_none(rng.choice(DESCRIPTIONS), row), format_or_none(rng.choice(IMAGE_URLS), row)
+        ])
+
+    return pd.DataFrame(records, columns=COLUMNS)
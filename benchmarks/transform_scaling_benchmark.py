@@ -0,0 +1,79 @@
+"""
+Times the transforming of one staging chunk by the DataCleaner with different numbers of the transform workers & both
+transports of the shards (pickled or as the Arrow IPC streams in shared memory) & checks that the parallel result is
+the serial one (the values, the order of the rows & the row hashes). No database is needed. Run from the root of the
+repository:
+
+    python -m benchmarks.transform_scaling_benchmark [rows] [workers ...]
+
+Measure the speed-up on the host the cleaner runs on, with as many workers as it has spare cores. On a single CPU the
+workers only take turns, so the parallel runs show just the overhead of the processes & of the transport.
+"""
+import os
+import sys
+import time
+import warnings
+
+import pandas as pd
+
+from _common.database_communicator.tables import DataMainCols, DataStagingCols
+from benchmarks.staging_frames import generate_staging_frame
+from crawler.data_cleaner.data_cleaner import DataCleaner
+
+DEFAULT_ROWS = 200_000
+DEFAULT_WORKERS = [1, 2, 4]
+
+
+class TransformOnlyCleaner(DataCleaner):
+    """The data cleaner without the database connection - only its transforming part is used."""
+
+    def __init__(self, transform_workers: int, transform_transport: str):
+        self.flow_name = 'benchmark'
+        self.transform_pool = None
+        self.TRANSFORM_WORKERS = transform_workers
+        self.TRANSFORM_TRANSPORT = transform_transport
+
+    def __del__(self):
+        self.stop_transform_workers()
+
+
+def transform(chunk: pd.DataFrame, transform_workers: int, transform_transport: str) -> pd.DataFrame:
+    cleaner = TransformOnlyCleaner(transform_workers, transform_transport)
+    cleaner.start_transform_workers()
+    try:
+        if cleaner.transform_pool is not None:
+            cleaner.transform_chunk(chunk.iloc[:100])  # the workers are started & warmed up outside the timing
+
+        start_time = time.perf_counter()
+        data = cleaner.transform_chunk(chunk)
+        transform_seconds = time.perf_counter() - start_time
+        print(f"{transform_workers} workers ({transform_transport}): {transform_seconds:.2f}s", flush=True)
+        return data
+    finally:
+        cleaner.stop_transform_workers()
+
+
+def main() -> None:
+    warnings.simplefilter('ignore', FutureWarning)
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ROWS
+    workers = [int(transform_workers) for transform_workers in sys.argv[2:]] or DEFAULT_WORKERS
+
+    # The chunks come sorted by the URL from the staging table
+    chunk = generate_staging_frame(rows).sort_values(DataStagingCols.URL, kind='stable', ignore_index=True)
+    print(f"Transforming {rows} staging rows on {os.cpu_count()} CPUs")
+
+    serial_data = transform(chunk, 1, DataCleaner.TRANSPORT_PICKLE)
+    for transform_workers in workers:
+        if transform_workers < 2:
+            continue
+
+        for transform_transport in (DataCleaner.TRANSPORT_PICKLE, DataCleaner.TRANSPORT_ARROW):
+            data = transform(chunk, transform_workers, transform_transport)
+            # The dtypes may differ, like between the chunks - e.g. the floors are ints only in the shards without a gap
+            pd.testing.assert_frame_equal(serial_data, data, check_dtype=False)
+            assert serial_data.index.tolist() == data.index.tolist()
+            assert serial_data[DataMainCols.ROW_HASH].tolist() == data[DataMainCols.ROW_HASH].tolist()
+
+
+if __name__ == '__main__':
+    main()
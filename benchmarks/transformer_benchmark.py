@@ -0,0 +1,84 @@
+"""
+Times the DataTransformer against the row-wise reference - the whole 'transform_data' & every pass over a column on its
+own, so a pass that is slower than the row-wise one can be spotted. Run from the root of the repository:
+
+    python -m benchmarks.transformer_benchmark [rows ...]
+"""
+from typing import Callable, Dict
+
+import sys
+import time
+import warnings
+
+import pandas as pd
+
+from _common.database_communicator.tables import DataStagingCols
+from benchmarks.reference_transformer import DataTransformer as ReferenceTransformer
+from benchmarks.staging_frames import generate_staging_frame
+from crawler.data_cleaner.data_transformer import DataTransformer, map_unique
+
+DEFAULT_ROWS = [10_000, 100_000, 1_000_000]
+
+
+def best_time(func: Callable[[], object], repeats: int) -> float:
+    times = []
+    for _ in range(repeats):
+        start_time = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start_time)
+    return min(times)
+
+
+def reference_passes(data: pd.DataFrame) -> Dict[str, Callable[[], object]]:
+    reference = ReferenceTransformer
+    return {
+        'normalize text': lambda: data.applymap(
+            lambda value: value.lower().strip() if isinstance(value, str) and 'http' not in value and 'www' not in value
+            else value
+        ),
+        'price & currency': lambda: (data[DataStagingCols.PRICE].apply(reference.extract_currency),
+                                     data[DataStagingCols.PRICE].apply(reference.extract_float)),
+        'size': lambda: data[DataStagingCols.SIZE].apply(reference.extract_float),
+        'location': lambda: data[DataStagingCols.LOCATION].apply(reference.extract_location),
+        'floor': lambda: data[DataStagingCols.FLOOR].apply(reference.extract_floor),
+        'property type': lambda: data[DataStagingCols.PROPERTY_TYPE].apply(reference.extract_property_type),
+    }
+
+
+def current_passes(data: pd.DataFrame) -> Dict[str, Callable[[], object]]:
+    transformer = DataTransformer
+    return {
+        'normalize text': lambda: data.apply(transformer.normalize_text),
+        'price & currency': lambda: map_unique(data[DataStagingCols.PRICE], transformer.extract_price_and_currency),
+        'size': lambda: map_unique(data[DataStagingCols.SIZE], transformer.extract_float),
+        'location': lambda: map_unique(data[DataStagingCols.LOCATION], transformer.extract_location),
+        'floor': lambda: map_unique(data[DataStagingCols.FLOOR], transformer.extract_floor),
+        'property type': lambda: map_unique(data[DataStagingCols.PROPERTY_TYPE], transformer.extract_property_type),
+    }
+
+
+def benchmark(rows: int) -> None:
+    repeats = 3 if rows < 1_000_000 else 1
+    data = generate_staging_frame(rows, seed=rows)
+
+    reference_total = best_time(lambda: ReferenceTransformer().transform_data(data.copy()), repeats)
+    current_total = best_time(lambda: DataTransformer().transform_data(data.copy()), repeats)
+    print(f"{rows} rows: transform_data {reference_total:.2f}s -> {current_total:.2f}s "
+          f"(x{reference_total / current_total:.1f})")
+
+    # The passes over the columns get the preprocessed data, like in 'transform_data'
+    preprocessed = DataTransformer()._preprocess_data(data.copy())
+    for (name, reference_pass), current_pass in zip(reference_passes(preprocessed).items(),
+                                                    current_passes(preprocessed).values()):
+        reference_time, current_time = best_time(reference_pass, repeats), best_time(current_pass, repeats)
+        print(f"    {name}: {reference_time:.3f}s -> {current_time:.3f}s (x{reference_time / current_time:.1f})")
+
+
+def main() -> None:
+    warnings.simplefilter('ignore', FutureWarning)
+    for rows in [int(rows) for rows in sys.argv[1:]] or DEFAULT_ROWS:
+        benchmark(rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""
+Checks that the DataTransformer gives the same output as the row-wise reference: the same frame (the dtypes included),
+the same repr & type of every cell & so the same row hashes. Run from the root of the repository:
+
+    python -m benchmarks.transformer_equivalence
+"""
+import warnings
+
+import pandas as pd
+
+from _common.database_communicator.tables import DataStagingCols
+from benchmarks.reference_transformer import DataTransformer as ReferenceTransformer
+from benchmarks.staging_frames import generate_staging_frame
+from crawler.data_cleaner.data_transformer import DataTransformer
+
+SEEDS = range(30)
+ROWS = [0, 1, 3, 50, 2000]
+
+
+def as_reference(data: pd.DataFrame) -> pd.DataFrame:
+    """The categoricals of the current transformer hold the same values as the object columns of the reference."""
+    data = data.copy()
+    for column in DataTransformer.CATEGORY_COLUMNS:
+        data[column] = data[column].astype(object).where(data[column].notna(), None)
+    return data
+
+
+def assert_equivalent(data: pd.DataFrame) -> None:
+    expected = ReferenceTransformer().transform_data(data.copy())
+    actual = as_reference(DataTransformer().transform_data(data.copy()))
+
+    pd.testing.assert_frame_equal(expected, actual)
+    for column in expected.columns:
+        assert [repr(value) for value in expected[column]] == [repr(value) for value in actual[column]], column
+        assert [type(value) for value in expected[column]] == [type(value) for value in actual[column]], column
+
+
+def main() -> None:
+    warnings.simplefilter('ignore', FutureWarning)
+
+    for seed in SEEDS:
+        for rows in ROWS:
+            assert_equivalent(generate_staging_frame(rows, seed))
+
+    # The columns with no values or with a single value get their dtypes differently
+    data = generate_staging_frame(20, seed=1)
+    data[[DataStagingCols.FLOOR, DataStagingCols.PROPERTY_TYPE, DataStagingCols.PRICE]] = None
+    data[DataStagingCols.SIZE] = '54'
+    assert_equivalent(data)
+
+    data = generate_staging_frame(20, seed=2)
+    data[DataStagingCols.FLOOR] = '2/4'
+    assert_equivalent(data)
+
+    print(f"The output is equivalent to the reference for {len(SEEDS) * len(ROWS) + 2} frames")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+from typing import Dict, List, Union
+
+from dataclasses import dataclass
+import json
+import os
+import threading
+
+from crawler.common.create_run_id import create_run_id
+
+
+@dataclass
+class OfferStatus:
+    QUEUED: str = 'queued'
+    IN_FLIGHT: str = 'in_flight'
+    EXTRACTED: str = 'extracted'
+    DONE: str = 'done'
+
+
+class CrawlFrontier:
+    """
+    A checkpoint of the crawl progress kept in a local file: the start page, the listing page reached & the status of
+    the offers found on it. A retried (or crashed) run loads the checkpoint & resumes from the listing page it stopped
+    at, instead of starting from the first start page again. The checkpoint is keyed with the id of the flow run, which
+    stays the same across its retries - a new flow run (e.g. the next scheduled one of the same day) starts afresh.
+
+    The offers are 'done' only after their records were saved into the database. The offers that were in flight or
+    already extracted, but not saved yet, are queued again on resume. The saved offers are marked by the staging writer
+    thread, so the changes of the state are locked.
+    """
+    CACHE_DIR: str = './crawler/cache/'
+
+    def __init__(self, crawler_name: str, flow_run_id: str = None):
+        """
+        :param flow_run_id: the id of the flow run the crawler runs in. Without it (e.g. a crawler started by hand), the
+        checkpoint is kept for the rest of the day.
+        """
+        self.path = os.path.join(self.CACHE_DIR, f'frontier_{crawler_name}.json')
+        self.run_id = f'{flow_run_id}_{crawler_name}' if flow_run_id is not None else create_run_id(crawler_name)
+
+        self.start_page_index = 0
+        self.page_url: Union[str, None] = None
+        self.page_number = 1
+        self.offers: Dict[str, str] = {}
+        self.lock = threading.RLock()
+
+    @classmethod
+    def load(cls, crawler_name: str, flow_run_id: str = None) -> 'CrawlFrontier':
+        frontier = cls(crawler_name, flow_run_id)
+        if not os.path.exists(frontier.path):
+            return frontier
+
+        with open(frontier.path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        if state['run_id'] != frontier.run_id:
+            print(f"Found a crawl checkpoint of another run ({state['run_id']}) - starting from scratch")
+            return frontier
+
+        frontier.start_page_index = state['start_page_index']
+        frontier.page_url = state['page_url']
+        frontier.page_number = state['page_number']
+        frontier.offers = {url: OfferStatus.QUEUED if status != OfferStatus.DONE else status
+                           for url, status in state['offers'].items()}
+        print(f"Resuming the crawl from the start page number {frontier.start_page_index + 1}, listing page number "
+              f"{frontier.page_number} with {len(frontier.pending_offers())} queued offers")
+        return frontier
+
+    def is_resumed_start_page(self, start_page_index: int) -> bool:
+        return start_page_index == self.start_page_index and self.page_url is not None
+
+    def pending_offers(self) -> List[str]:
+        return [url for url, status in self.offers.items() if status == OfferStatus.QUEUED]
+
+    def extracted_offers(self) -> List[str]:
+        with self.lock:
+            return [url for url, status in self.offers.items() if status == OfferStatus.EXTRACTED]
+
+    def begin_page(self, start_page_index: int, page_url: str, page_number: int, offer_urls: List[str]) -> None:
+        with self.lock:
+            self.offers = {url: status for url, status in self.offers.items() if status != OfferStatus.DONE}
+            self.start_page_index = start_page_index
+            self.page_url = page_url
+            self.page_number = page_number
+            for url in offer_urls:
+                self.offers[url] = OfferStatus.QUEUED
+            self.save()
+
+    def mark_in_flight(self, url: str) -> None:
+        with self.lock:
+            self.offers[url] = OfferStatus.IN_FLIGHT
+            self.save()
+
+    def mark_extracted(self, url: str) -> None:
+        with self.lock:
+            self.offers[url] = OfferStatus.EXTRACTED
+            self.save()
+
+    def mark_saved(self, urls: List[str]) -> None:
+        """
+        :param urls: the offers whose records were committed into the database - call it only after the commit.
+        """
+        if not urls:
+            return
+
+        with self.lock:
+            for url in urls:
+                if self.offers.get(url) == OfferStatus.EXTRACTED:
+                    self.offers[url] = OfferStatus.DONE
+            self.save()
+
+    def finish_start_page(self, start_page_index: int) -> None:
+        """Call it only after all the records of the start page were saved - the offers are not kept anymore."""
+        with self.lock:
+            self.start_page_index = start_page_index + 1
+            self.page_url = None
+            self.page_number = 1
+            self.offers = {}
+            self.save()
+
+    def complete(self) -> None:
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def save(self) -> None:
+        os.makedirs(self.CACHE_DIR, exist_ok=True)
+
+        with self.lock:
+            state = {'run_id': self.run_id, 'start_page_index': self.start_page_index, 'page_url': self.page_url,
+                     'page_number': self.page_number, 'offers': self.offers}
+            temp_path = self.path + '.tmp'
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(state, f)
+            os.replace(temp_path, self.path)
@@ -0,0 +1,98 @@
+from typing import List, Union
+from urllib.parse import urljoin
+
+import re
+
+from lxml import html
+from lxml.etree import ParserError
+from selenium.common.exceptions import NoSuchElementException
+from selenium.webdriver.common.by import By
+
+
+class HtmlElement:
+    """
+    A read-only counterpart of the Selenium 'WebElement' for an element of the static HTML document. It implements only
+    the part of the interface that is used by the data extractors.
+    """
+    BLOCK_TAGS = {'address', 'article', 'aside', 'blockquote', 'br', 'dd', 'div', 'dl', 'dt', 'figcaption', 'figure',
+                  'footer', 'form', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'header', 'hr', 'li', 'main', 'nav', 'ol', 'p',
+                  'pre', 'section', 'table', 'td', 'th', 'tr', 'ul'}
+    SKIPPED_TAGS = {'script', 'style', 'noscript', 'template'}
+
+    def __init__(self, element: html.HtmlElement, base_url: str = None):
+        self.element = element
+        self.base_url = base_url
+
+    @property
+    def text(self) -> str:
+        """
+        Approximation of the text rendered by the browser: the block elements are separated with new lines, the inline
+        elements are glued together & the whitespaces are collapsed, just like the 'WebElement.text' does.
+        """
+        chunks = []
+        self._collect_text(self.element, chunks)
+
+        lines = [re.sub(r'\s+', ' ', line).strip() for line in ''.join(chunks).split('\n')]
+        return '\n'.join(line for line in lines if line)
+
+    def _collect_text(self, element: html.HtmlElement, chunks: List[str]) -> None:
+        tag = element.tag if isinstance(element.tag, str) else None
+        if tag in self.SKIPPED_TAGS:
+            return
+
+        is_block = tag in self.BLOCK_TAGS
+        if is_block:
+            chunks.append('\n')
+        if tag is not None and element.text:
+            chunks.append(element.text)
+        for child in element:
+            self._collect_text(child, chunks)
+            if child.tail:
+                chunks.append(child.tail)
+        if is_block:
+            chunks.append('\n')
+
+    def get_attribute(self, name: str) -> Union[str, None]:
+        """Just like in Selenium, the links are returned as the absolute URLs."""
+        value = self.element.get(name)
+        if value is not None and name in ('href', 'src') and self.base_url:
+            value = urljoin(self.base_url, value)
+        return value
+
+    def get_property(self, name: str) -> Union[str, None]:
+        return self.get_attribute(name)
+
+    def click(self) -> None:
+        """There is nothing to click in the static document - the buttons are pressed only to reveal the content."""
+        pass
+
+
+class HtmlPage:
+    """
+    A static HTML document that can be passed to the data extractors instead of the Selenium webdriver. The elements
+    are looked up with the very same XPaths, but without any browser running.
+    """
+
+    def __init__(self, page_source: str, url: str = None):
+        self.page_source = page_source
+        self.current_url = url
+
+        try:
+            parser = html.HTMLParser(encoding='utf-8')
+            self.tree = html.document_fromstring(page_source.encode('utf-8'), parser=parser)
+        except ParserError:
+            self.tree = html.document_fromstring('<html></html>')
+
+    def find_elements(self, by: By, expression: str) -> List[HtmlElement]:
+        if by != By.XPATH:
+            raise ValueError(f"Only the XPath lookups are supported for the static HTML pages, got: {by}")
+
+        return [HtmlElement(element, base_url=self.current_url) for element in self.tree.xpath(expression)
+                if isinstance(element, html.HtmlElement)]
+
+    def find_element(self, by: By, expression: str) -> HtmlElement:
+        elements = self.find_elements(by, expression)
+        if not elements:
+            raise NoSuchElementException(f"Unable to locate element: {expression}")
+
+        return elements[0]
@@ -0,0 +1,37 @@
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from crawler.common.html_page import HtmlPage
+
+
+class HttpFetcher:
+    """
+    Fetches the offer pages with the plain HTTP requests. The underlying session keeps the connections alive, so the
+    consecutive requests to the same portal reuse the already opened (and TLS-negotiated) connections.
+    """
+    POOL_SIZE: int = 10
+    TIMEOUT: float = 30
+    RETRIES: int = 3
+
+    def __init__(self, user_agent: str = None):
+        retry = Retry(total=self.RETRIES, backoff_factor=2, status_forcelist=[429, 500, 502, 503, 504])
+        adapter = HTTPAdapter(pool_connections=self.POOL_SIZE, pool_maxsize=self.POOL_SIZE, max_retries=retry)
+
+        self.session = requests.Session()
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers.update({'Accept-Language': 'pl-PL,pl;q=0.9,en;q=0.8'})
+        if user_agent is not None:
+            self.session.headers.update({'User-Agent': user_agent})
+
+    def fetch(self, url: str) -> HtmlPage:
+        response = self.session.get(url, timeout=self.TIMEOUT)
+        response.raise_for_status()
+        if 'charset' not in response.headers.get('Content-Type', ''):
+            response.encoding = 'utf-8'
+
+        return HtmlPage(response.text, url=response.url)
+
+    def close(self) -> None:
+        self.session.close()
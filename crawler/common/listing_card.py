@@ -0,0 +1,51 @@
+from typing import Union, Any
+
+from dataclasses import dataclass
+import hashlib
+
+ROOMS_NUMBER_MAP = {'one': 1, 'two': 2, 'three': 3, 'four': 4, 'five': 5, 'six': 6, 'seven': 7, 'eight': 8, 'nine': 9,
+                    'ten': 10}
+
+
+@dataclass
+class ListingCard:
+    """The offer as it is shown on the listing page - only the link & a few fields visible on the offer card."""
+    url: str
+    price: Union[float, None] = None
+    size: Union[float, None] = None
+    rooms: Union[int, None] = None
+    # False for the listed items that are not scraped (e.g. the investments or the offers reposted from other portals)
+    to_scrape: bool = True
+
+    def fingerprint(self) -> int:
+        return self.create_fingerprint(self.price)
+
+    @staticmethod
+    def create_fingerprint(price: Union[float, None]) -> int:
+        """
+        A compact (64-bit) hash of the card fields. It is computed from the card on the listing page & from the values
+        stored in the database, so the values are normalized first - the rounding hides the float representation
+        differences.
+
+        Only the price is hashed - it's the only field both sides keep with the same precision. The rooms are shown
+        only as a bucket ('4 i więcej') on the cards & the size is cut to the integer part by the OLX extractor, while
+        the cards show the fractions. A size change would not update the stored record anyway, since the size is not
+        a part of its 'row_hash'.
+        """
+        values_to_hash = (None if price is None else round(float(price), 2),)
+        return int.from_bytes(hashlib.blake2b(str(values_to_hash).encode('utf-8'), digest_size=8).digest(), 'little')
+
+    @staticmethod
+    def to_float(value: Any) -> Union[float, None]:
+        try:
+            return float(str(value).replace(',', '.').replace(' ', ''))
+        except (TypeError, ValueError):
+            return None
+
+    @staticmethod
+    def to_rooms(value: Any) -> Union[int, None]:
+        if value is None:
+            return None
+        if str(value).isdigit():
+            return int(value)
+        return ROOMS_NUMBER_MAP.get(str(value).lower())
@@ -0,0 +1,190 @@
+from typing import Dict, List, Iterator, Tuple, Union
+
+from datetime import datetime, timedelta
+import fcntl
+import gzip
+import hashlib
+import json
+import os
+import queue
+import threading
+
+
+class PageStore:
+    """
+    A store of the fetched webpages, so the data can be extracted from them again later on (e.g. to backfill a new
+    column) without visiting the portals.
+
+    The page bodies are gzip-compressed & appended to the segment files; every body is stored only once (the bodies are
+    addressed by their SHA-256 hash). The index is a JSON-lines file with one entry per stored page: the URL, the hash
+    of the body & its location in the segment. Every store instance writes to its own segments & the index is appended
+    under a file lock, so a few processes can write to the same directory.
+    """
+    SEGMENT_MAX_BYTES: int = 64 * 1024 ** 2
+    QUEUE_SIZE: int = 100
+
+    def __init__(self, root_dir: str, retention_days: Union[int, None] = 90,
+                 max_total_bytes: Union[int, None] = 5 * 1024 ** 3):
+        self.root_dir = root_dir
+        self.index_path = os.path.join(root_dir, 'index.jsonl')
+        self.retention_days = retention_days
+        self.max_total_bytes = max_total_bytes
+        os.makedirs(root_dir, exist_ok=True)
+
+        self.entries: Dict[str, List[dict]] = {}
+        self.bodies: Dict[str, dict] = {}
+        self._load_index()
+
+        self.segment_prefix = f"segment_{datetime.now().strftime('%Y%m%d%H%M%S')}_{os.getpid()}"
+        self.segment_number = 0
+        self.lock = threading.Lock()
+
+        self.queue = None
+        self.writer_thread = None
+        self.writer_error = None
+
+    def _load_index(self) -> None:
+        if not os.path.exists(self.index_path):
+            return
+
+        with open(self.index_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                entry = json.loads(line)
+                self.entries.setdefault(entry['url'], []).append(entry)
+                self.bodies[entry['hash']] = entry
+
+    def put(self, url: str, page_source: str) -> str:
+        body = page_source.encode('utf-8')
+        content_hash = hashlib.sha256(body).hexdigest()
+
+        with self.lock:
+            location = self.bodies.get(content_hash)
+            if location is None:
+                location = self._append_body(gzip.compress(body))
+
+            entry = {'url': url, 'hash': content_hash, 'segment': location['segment'], 'offset': location['offset'],
+                     'length': location['length'], 'stored_at': datetime.now().isoformat(timespec='seconds')}
+            with open(self.index_path, 'a', encoding='utf-8') as f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                f.write(json.dumps(entry) + '\n')
+
+            self.entries.setdefault(url, []).append(entry)
+            self.bodies[content_hash] = entry
+
+        return content_hash
+
+    def _append_body(self, compressed_body: bytes) -> dict:
+        segment = f'{self.segment_prefix}_{self.segment_number:04d}.gz'
+        segment_path = os.path.join(self.root_dir, segment)
+        if os.path.exists(segment_path) and os.path.getsize(segment_path) >= self.SEGMENT_MAX_BYTES:
+            self.segment_number += 1
+            segment = f'{self.segment_prefix}_{self.segment_number:04d}.gz'
+            segment_path = os.path.join(self.root_dir, segment)
+
+        with open(segment_path, 'ab') as f:
+            offset = f.tell()
+            f.write(compressed_body)
+
+        return {'segment': segment, 'offset': offset, 'length': len(compressed_body)}
+
+    def put_async(self, url: str, page_source: str) -> None:
+        """Queue the page to be stored by a background thread, so the crawling does not wait for the disk."""
+        if self.writer_error is not None:
+            raise self.writer_error
+
+        if self.writer_thread is None:
+            self.queue = queue.Queue(maxsize=self.QUEUE_SIZE)
+            self.writer_thread = threading.Thread(target=self._write_queued_pages, daemon=True)
+            self.writer_thread.start()
+
+        self.queue.put((url, page_source))
+
+    def _write_queued_pages(self) -> None:
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return
+            try:
+                self.put(*item)
+            except Exception as e:
+                self.writer_error = e
+
+    def close(self) -> None:
+        if self.writer_thread is not None:
+            self.queue.put(None)
+            self.writer_thread.join()
+            self.writer_thread = None
+
+        if self.writer_error is not None:
+            raise self.writer_error
+
+    def get(self, url: str) -> Union[str, None]:
+        """Read the most recently stored version of the page."""
+        entries = self.entries.get(url)
+        if not entries:
+            return None
+        return self._read_body(entries[-1])
+
+    def _read_body(self, entry: dict) -> str:
+        return self.read_body(self.root_dir, entry)
+
+    @staticmethod
+    def read_body(root_dir: str, entry: dict) -> str:
+        """Read the page body of the index entry - without loading the index, e.g. in another process."""
+        with open(os.path.join(root_dir, entry['segment']), 'rb') as f:
+            f.seek(entry['offset'])
+            compressed_body = f.read(entry['length'])
+        return gzip.decompress(compressed_body).decode('utf-8')
+
+    def iter_latest_entries(self) -> Iterator[Tuple[str, dict]]:
+        """
+        :return: the URL & the index entry of the latest version of every page, ordered by the location of the body in
+        the segments - the bodies read in this order are read sequentially, segment by segment.
+        """
+        latest_entries = [(url, entries[-1]) for url, entries in self.entries.items()]
+        yield from sorted(latest_entries, key=lambda page: (page[1]['segment'], page[1]['offset']))
+
+    def apply_retention(self) -> None:
+        """
+        Remove the oldest segments: the ones whose newest page is older than the retention period, and then the oldest
+        ones until the total size of the store fits the limit. It should be run when nothing else writes to the store.
+        """
+        segments_last_stored = {}
+        for entries in self.entries.values():
+            for entry in entries:
+                stored_at = datetime.fromisoformat(entry['stored_at'])
+                segment = entry['segment']
+                segments_last_stored[segment] = max(segments_last_stored.get(segment, stored_at), stored_at)
+
+        segments = sorted(segments_last_stored, key=segments_last_stored.get)
+        segment_sizes = {segment: os.path.getsize(os.path.join(self.root_dir, segment)) for segment in segments}
+        total_bytes = sum(segment_sizes.values())
+
+        segments_to_remove = set()
+        for segment in segments:
+            too_old = (self.retention_days is not None and
+                       segments_last_stored[segment] < datetime.now() - timedelta(days=self.retention_days))
+            too_big = self.max_total_bytes is not None and total_bytes > self.max_total_bytes
+            if not too_old and not too_big:
+                break
+
+            segments_to_remove.add(segment)
+            total_bytes -= segment_sizes[segment]
+
+        if not segments_to_remove:
+            return
+
+        with open(self.index_path, 'r+', encoding='utf-8') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            kept_lines = [line for line in f if json.loads(line)['segment'] not in segments_to_remove]
+            f.seek(0)
+            f.writelines(kept_lines)
+            f.truncate()
+
+        for segment in segments_to_remove:
+            os.remove(os.path.join(self.root_dir, segment))
+
+        self.entries = {}
+        self.bodies = {}
+        self._load_index()
+        print(f"Removed {len(segments_to_remove)} page store segments; {total_bytes / 1024 ** 2:.0f} MB left")
@@ -0,0 +1,190 @@
+from typing import Dict, Iterator, Union
+
+from contextlib import contextmanager
+from dataclasses import dataclass
+from multiprocessing.context import BaseContext
+from multiprocessing.managers import BaseManager, BaseProxy
+from urllib.parse import urlparse
+import random
+import threading
+import time
+
+
+@dataclass
+class RequestOutcome:
+    """Filled by the caller of 'DomainRateLimiter.request_slot' - whether the portal refused to serve the page."""
+    blocked: bool = False
+
+
+@dataclass
+class _DomainState:
+    tokens: float
+    updated_at: float
+    avg_response_seconds: float
+    backoff: float = 1.0
+
+
+class DomainRateLimiter:
+    """
+    A token bucket per domain, shared by all the fetchers of a process (see 'get_rate_limiter'). It replaces the fixed
+    random sleeps after every request: a fetcher waits only as long as it's needed to keep the request rate below the
+    limit of the domain.
+
+    The limit adapts to the portal: the interval between the requests follows the average response time (a slowly
+    responding portal is not pushed harder) & it's multiplied after the errors/captcha pages, then slowly relaxed
+    again after the successful requests. The waiting & working time is counted, so the throughput can be tuned against
+    the risk of getting blocked.
+    """
+    MIN_INTERVAL: float = 3.0
+    MAX_INTERVAL: float = 180.0
+    BURST: float = 2.0
+    JITTER: float = 0.3
+    RESPONSE_TIME_FACTOR: float = 1.5
+    BACKOFF_FACTOR: float = 2.0
+    RECOVERY_FACTOR: float = 0.8
+
+    def __init__(self, min_interval: float = None):
+        self.min_interval = min_interval or self.MIN_INTERVAL
+        self.lock = threading.Lock()
+        self.domains: Dict[str, _DomainState] = {}
+
+        self.requests = 0
+        self.failures = 0
+        self.wait_seconds = 0.0
+        self.work_seconds = 0.0
+
+    def _get_state(self, domain: str) -> _DomainState:
+        if domain not in self.domains:
+            self.domains[domain] = _DomainState(tokens=self.BURST, updated_at=time.monotonic(),
+                                                avg_response_seconds=0.0)
+        return self.domains[domain]
+
+    def get_interval(self, domain: str) -> float:
+        state = self._get_state(domain)
+        interval = max(self.min_interval, state.avg_response_seconds * self.RESPONSE_TIME_FACTOR) * state.backoff
+        return min(interval, self.MAX_INTERVAL)
+
+    def acquire(self, url: str) -> None:
+        domain = urlparse(url).netloc
+        start_time = time.monotonic()
+        while True:
+            with self.lock:
+                state = self._get_state(domain)
+                interval = self.get_interval(domain)
+
+                now = time.monotonic()
+                state.tokens = min(self.BURST, state.tokens + (now - state.updated_at) / interval)
+                state.updated_at = now
+                if state.tokens >= 1:
+                    state.tokens -= 1
+                    break
+
+                wait = (1 - state.tokens) * interval * random.uniform(1, 1 + self.JITTER)
+            time.sleep(wait)
+
+        with self.lock:
+            self.wait_seconds += time.monotonic() - start_time
+
+    def report(self, url: str, response_seconds: float, ok: bool) -> None:
+        domain = urlparse(url).netloc
+        with self.lock:
+            state = self._get_state(domain)
+            self.requests += 1
+            self.work_seconds += response_seconds
+
+            if ok:
+                state.avg_response_seconds = 0.8 * state.avg_response_seconds + 0.2 * response_seconds
+                state.backoff = max(1.0, state.backoff * self.RECOVERY_FACTOR)
+            else:
+                self.failures += 1
+                state.backoff = min(self.MAX_INTERVAL / self.min_interval, state.backoff * self.BACKOFF_FACTOR)
+                state.tokens = 0
+                print(f"The request to {domain} failed or was blocked - slowing down to one request per "
+                      f"{self.get_interval(domain):.1f}s")
+
+    @contextmanager
+    def request_slot(self, url: str) -> Iterator[RequestOutcome]:
+        """Wait for the turn of the request, then measure it & adapt the limit to its outcome."""
+        self.acquire(url)
+        outcome = RequestOutcome()
+        start_time = time.monotonic()
+        try:
+            yield outcome
+        except Exception:
+            self.report(url, time.monotonic() - start_time, ok=False)
+            raise
+        self.report(url, time.monotonic() - start_time, ok=not outcome.blocked)
+
+    def get_stats(self) -> str:
+        busy_share = self.work_seconds / max(self.work_seconds + self.wait_seconds, 1e-9)
+        intervals = ', '.join(f'{domain}: {self.get_interval(domain):.1f}s' for domain in self.domains)
+        return (f"Rate limiter: {self.requests} requests ({self.failures} failed/blocked), {self.wait_seconds:.0f}s "
+                f"waiting vs {self.work_seconds:.0f}s working ({busy_share:.0%} busy). Current intervals: {intervals}")
+
+    def report_stats(self) -> None:
+        print(self.get_stats())
+
+
+class SharedRateLimiterProxy(BaseProxy):
+    """
+    The rate limiter kept in a manager process & used by several processes (the crawler & its extraction workers).
+    The token buckets are shared, so the limit of a domain holds for all the processes together - the waiting for a
+    token happens in the manager, the requests themselves in the calling processes.
+    """
+    _exposed_ = ('acquire', 'report', 'get_stats')
+
+    def acquire(self, url: str) -> None:
+        self._callmethod('acquire', (url,))
+
+    def report(self, url: str, response_seconds: float, ok: bool) -> None:
+        self._callmethod('report', (url, response_seconds, ok))
+
+    def get_stats(self) -> str:
+        return self._callmethod('get_stats')
+
+    request_slot = DomainRateLimiter.request_slot
+    report_stats = DomainRateLimiter.report_stats
+
+
+class _RateLimiterManager(BaseManager):
+    pass
+
+
+_RateLimiterManager.register('DomainRateLimiter', DomainRateLimiter, proxytype=SharedRateLimiterProxy)
+
+_rate_limiter: Union[DomainRateLimiter, SharedRateLimiterProxy] = None
+_rate_limiter_manager: Union[_RateLimiterManager, None] = None
+_rate_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> Union[DomainRateLimiter, SharedRateLimiterProxy]:
+    """The rate limiter shared by all the fetchers of the process."""
+    global _rate_limiter
+
+    with _rate_limiter_lock:
+        if _rate_limiter is None:
+            _rate_limiter = DomainRateLimiter()
+        return _rate_limiter
+
+
+def share_rate_limiter(mp_context: BaseContext) -> SharedRateLimiterProxy:
+    """
+    Move the rate limiter of the process into a manager process, so it can be passed to the worker processes (see
+    'use_rate_limiter'). The limiter starts afresh - it's meant to be called before the crawling starts.
+    """
+    global _rate_limiter, _rate_limiter_manager
+
+    with _rate_limiter_lock:
+        if not isinstance(_rate_limiter, SharedRateLimiterProxy):
+            _rate_limiter_manager = _RateLimiterManager(ctx=mp_context)
+            _rate_limiter_manager.start()
+            _rate_limiter = _rate_limiter_manager.DomainRateLimiter()
+        return _rate_limiter
+
+
+def use_rate_limiter(rate_limiter: SharedRateLimiterProxy) -> None:
+    """Make the rate limiter shared by another process the one of this process."""
+    global _rate_limiter
+
+    with _rate_limiter_lock:
+        _rate_limiter = rate_limiter
@@ -0,0 +1,64 @@
+from typing import Any, Dict, List, Sequence, Tuple
+
+from _common.database_communicator.tables import DataStaging, DataStagingCols
+
+# The ingest id is set by the staging table when the records are saved, not by the extractors
+STAGING_COLUMNS = tuple(column.key for column in DataStaging.__table__.columns
+                        if column.key != DataStagingCols.INGEST_ID)
+
+
+class RecordBatch:
+    """
+    The scraped records with a fixed schema (the columns of the staging table by default). The records are kept as the
+    tuples in the order of the columns, so:
+        - a record is appended at once - the columns can not get out of the alignment when an extraction fails midway,
+        - the rows are handed over to the staging writer (COPY) as they are, without zipping the columns first.
+
+    The columns can still be read like from the dictionary of lists ('batch[DataStagingCols.URL]').
+
+    Only the columns are fixed, the types of the values are not checked - the values are kept as the extractors give
+    them & only the COPY into the staging table turns them into text (see 'encode_copy_value').
+    """
+    __slots__ = ('columns', 'rows', '_column_positions')
+
+    def __init__(self, columns: Sequence[str] = STAGING_COLUMNS):
+        self.columns = tuple(columns)
+        self.rows: List[Tuple] = []
+        self._column_positions = {column: position for position, column in enumerate(self.columns)}
+
+    def append(self, record: Dict[str, Any]) -> None:
+        """
+        :param record: the column -> the value; the columns that are not given are set to None.
+        """
+        unknown_columns = record.keys() - self._column_positions.keys()
+        if unknown_columns:
+            raise KeyError(f"The columns are not in the schema of the record batch: {sorted(unknown_columns)}")
+
+        self.rows.append(tuple(record.get(column) for column in self.columns))
+
+    def extend(self, other: 'RecordBatch') -> None:
+        if other.columns != self.columns:
+            raise ValueError("Can not merge the record batches with different columns")
+        self.rows.extend(other.rows)
+
+    def clear(self) -> None:
+        # A new list, not 'list.clear' - the rows handed over to the staging writer may not be saved yet
+        self.rows = []
+
+    def keys(self) -> Tuple[str, ...]:
+        return self.columns
+
+    def __getitem__(self, column: str) -> list:
+        position = self._column_positions[column]
+        return [row[position] for row in self.rows]
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __getstate__(self) -> Tuple[Tuple[str, ...], List[Tuple]]:
+        return self.columns, self.rows
+
+    def __setstate__(self, state: Tuple[Tuple[str, ...], List[Tuple]]) -> None:
+        columns, rows = state
+        self.__init__(columns)
+        self.rows = rows
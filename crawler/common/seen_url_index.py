@@ -0,0 +1,157 @@
+from typing import Iterable, Set
+
+from datetime import date, datetime
+import hashlib
+import os
+import pickle
+
+from dateutil.relativedelta import relativedelta
+import numpy as np
+from sqlalchemy.orm import Session
+
+from _common.database_communicator.tables import DataStaging, DataMain
+from crawler.common.listing_card import ListingCard
+
+
+class SeenUrlIndex:
+    """
+    An index of the offer URLs that are already in the database. The URLs are kept as 64-bit hashes in the sorted
+    'uint64' arrays & looked up with a binary search ('searchsorted'), so the index takes 8 bytes per URL (plus the
+    parallel arrays) instead of the Python objects of a dict, & checking an offer costs O(log n). The URLs added during
+    the run are kept in a set - there are only as many of them as the offers queued in one run.
+
+    The 'data_main' part is cached on the disk together with a 'last_time_seen' watermark - the next refresh downloads
+    only the rows seen since then. The 'data_staging' part is always loaded whole, since the staging table is cleared
+    after every cleaning run.
+
+    For every 'data_main' URL, a fingerprint of the fields shown on the listing cards is kept as well. Thanks to that,
+    the offers that changed (e.g. the price has been lowered) can be spotted on the listing page already.
+    """
+    MAIN_URLS_MAX_AGE_WEEKS: int = 4
+    CACHE_PATH: str = './crawler/cache/seen_urls.pickle'
+    CACHE_VERSION: int = 4
+
+    def __init__(self, cache_path: str = None):
+        self.cache_path = cache_path or self.CACHE_PATH
+
+        # Sorted URL keys & the parallel arrays: the ordinal of the 'last_time_seen' date & the fingerprint of the
+        # listing card fields
+        self.main_keys = np.empty(0, dtype=np.uint64)
+        self.main_last_seen = np.empty(0, dtype=np.int32)
+        self.main_fingerprints = np.empty(0, dtype=np.uint64)
+        self.staging_keys = np.empty(0, dtype=np.uint64)  # sorted
+        self.added_keys: Set[int] = set()
+        self.watermark: date = None
+
+    def __contains__(self, url: str) -> bool:
+        key = self.url_key(url)
+        return (key in self.added_keys or self._find(self.staging_keys, key) >= 0
+                or self._find(self.main_keys, key) >= 0)
+
+    @staticmethod
+    def url_key(url: str) -> int:
+        return int.from_bytes(hashlib.blake2b(url.encode('utf-8'), digest_size=8).digest(), 'little')
+
+    @staticmethod
+    def _find(sorted_keys: np.ndarray, key: int) -> int:
+        """:return: the position of the key in the sorted keys or -1."""
+        # The key is passed as 'uint64' - a Python int above 2^63 would be compared as a float
+        key = np.uint64(key)
+        position = sorted_keys.searchsorted(key)
+        if position < len(sorted_keys) and sorted_keys[position] == key:
+            return position
+        return -1
+
+    @classmethod
+    def _to_sorted_keys(cls, urls: Iterable[str]) -> np.ndarray:
+        keys = np.fromiter((cls.url_key(url) for url in urls), dtype=np.uint64)
+        return np.unique(keys)
+
+    def is_in_main(self, url: str) -> bool:
+        return self._find(self.main_keys, self.url_key(url)) >= 0
+
+    def has_changed(self, url: str, fingerprint: int) -> bool:
+        position = self._find(self.main_keys, self.url_key(url))
+        return position >= 0 and int(self.main_fingerprints[position]) != fingerprint
+
+    def update_fingerprint(self, url: str, fingerprint: int) -> None:
+        """Only the 'data_main' URLs have the fingerprints - the other URLs are ignored."""
+        position = self._find(self.main_keys, self.url_key(url))
+        if position >= 0:
+            self.main_fingerprints[position] = fingerprint
+
+    def add(self, url: str) -> None:
+        """Mark the URL as already scraped, e.g. when it is queued for the extraction during the current run."""
+        self.added_keys.add(self.url_key(url))
+
+    def refresh(self, session: Session) -> None:
+        cut_date = (datetime.today() - relativedelta(weeks=self.MAIN_URLS_MAX_AGE_WEEKS)).date()
+        self._load_cache()
+
+        query = session.query(DataMain.url, DataMain.last_time_seen, DataMain.price)
+        if self.watermark is not None:
+            # The rows seen on the watermark day could be updated after the previous refresh, hence '>='
+            query = query.where(DataMain.last_time_seen >= max(self.watermark, cut_date))
+        else:
+            query = query.where(DataMain.last_time_seen > cut_date)
+
+        new_keys, new_last_seen, new_fingerprints = [], [], []
+        for url, last_time_seen, price in query.yield_per(10_000):
+            new_keys.append(self.url_key(url))
+            new_last_seen.append(last_time_seen.toordinal())
+            new_fingerprints.append(ListingCard.create_fingerprint(price))
+            self.watermark = last_time_seen if self.watermark is None else max(self.watermark, last_time_seen)
+        new_main_rows = len(new_keys)
+
+        self._merge_main_rows(np.array(new_keys, dtype=np.uint64), np.array(new_last_seen, dtype=np.int32),
+                              np.array(new_fingerprints, dtype=np.uint64), cut_date.toordinal())
+        self.staging_keys = self._to_sorted_keys(url for url, in session.query(DataStaging.url).yield_per(10_000))
+        self.added_keys = set()
+        self._save_cache()
+
+        print(f"Seen URLs index refreshed: downloaded {new_main_rows} 'data_main' rows since the watermark "
+              f"({self.watermark}); {len(self.main_keys)} 'data_main' URLs & {len(self.staging_keys)} "
+              f"'data_staging' URLs indexed")
+
+    def _merge_main_rows(self, keys: np.ndarray, last_seen: np.ndarray, fingerprints: np.ndarray,
+                         cut_ordinal: int) -> None:
+        """
+        Merge the downloaded rows into the sorted arrays - a downloaded URL replaces the indexed one - & drop the URLs
+        not seen since the cut date.
+        """
+        keys = np.concatenate([self.main_keys, keys])
+        last_seen = np.concatenate([self.main_last_seen, last_seen])
+        fingerprints = np.concatenate([self.main_fingerprints, fingerprints])
+
+        # The stable sort keeps the downloaded row after the indexed one of the same URL - only the last one is kept
+        order = np.argsort(keys, kind='stable')
+        keys, last_seen, fingerprints = keys[order], last_seen[order], fingerprints[order]
+        keep = np.append(keys[1:] != keys[:-1], True) & (last_seen > cut_ordinal)
+
+        self.main_keys = keys[keep]
+        self.main_last_seen = last_seen[keep]
+        self.main_fingerprints = fingerprints[keep]
+
+    def _load_cache(self) -> None:
+        if len(self.main_keys) or not os.path.exists(self.cache_path):
+            return
+
+        with open(self.cache_path, 'rb') as f:
+            cache = pickle.load(f)
+        if cache.get('version') != self.CACHE_VERSION:
+            return
+
+        self.main_keys = cache['main_keys']
+        self.main_last_seen = cache['main_last_seen']
+        self.main_fingerprints = cache['main_fingerprints']
+        self.watermark = cache['watermark']
+
+    def _save_cache(self) -> None:
+        os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+
+        temp_path = self.cache_path + '.tmp'
+        with open(temp_path, 'wb') as f:
+            pickle.dump({'version': self.CACHE_VERSION, 'main_keys': self.main_keys,
+                         'main_last_seen': self.main_last_seen, 'main_fingerprints': self.main_fingerprints,
+                         'watermark': self.watermark}, f)
+        os.replace(temp_path, self.cache_path)
@@ -1,16 +1,29 @@
-from typing import Union, List
+from typing import Union, List, Dict
 
+from collections import defaultdict
+import json
 import random
+import re
 import time
 
 from selenium.webdriver.remote.webelement import WebElement
+from selenium.webdriver.remote.webdriver import WebDriver as RemoteWebDriver
 from selenium.webdriver.chrome.webdriver import WebDriver
-from selenium.common.exceptions import NoSuchElementException
+from selenium.webdriver.support import expected_conditions
+from selenium.webdriver.support.wait import WebDriverWait
+from selenium.common.exceptions import NoSuchElementException, TimeoutException
 from selenium.webdriver.common.by import By
 
+# How long the waits for the particular elements took - shared by all the crawlers & extractors of the process
+_wait_timings: Dict[str, List[float]] = defaultdict(list)
+
 
 class SeleniumCommonMethods:
+    WAIT_TIMEOUT: float = 10
+    CONSENT_TIMEOUT: float = 5
+
     driver: WebDriver
+    consent_accepted: bool = False
 
     def _find_element(self, by: By, expression: str, raise_exception: bool = False) -> Union[WebElement, None]:
         """
@@ -32,6 +45,54 @@ class SeleniumCommonMethods:
 
         return element
 
+    def wait_for_element(self, by: By, expression: str, timeout: float = None) -> Union[WebElement, None]:
+        """
+        Wait until the element is present on the page & return it as soon as it is, instead of sleeping for a fixed
+        time. The time of every wait is recorded (see 'report_wait_timings'), so the slow elements can be spotted.
+
+        :param by: an attribute by which an element will be searched.
+        :param expression: an expression that is used to match proper element.
+        :param timeout: how many seconds to wait at most; defaults to 'WAIT_TIMEOUT'.
+        :return: the element or None, if it did not show up before the timeout.
+        """
+        if not isinstance(self.driver, RemoteWebDriver):
+            # A static page (e.g. fetched over HTTP) is complete already - there is nothing to wait for
+            return self._find_element(by, expression)
+
+        start_time = time.perf_counter()
+        try:
+            element = WebDriverWait(self.driver, timeout or self.WAIT_TIMEOUT, poll_frequency=0.1).until(
+                expected_conditions.presence_of_element_located((by, expression))
+            )
+        except TimeoutException:
+            element = None
+
+        _wait_timings[expression].append(time.perf_counter() - start_time)
+        return element
+
+    @staticmethod
+    def report_wait_timings() -> None:
+        if not _wait_timings:
+            return
+
+        print("Waits for the page elements (the slowest first):")
+        for expression, timings in sorted(_wait_timings.items(), key=lambda item: -sum(item[1]) / len(item[1])):
+            print(f"  {expression}: {len(timings)} waits, avg {sum(timings) / len(timings):.2f}s, "
+                  f"max {max(timings):.2f}s")
+
+    def accept_consent(self, text: str = 'Akceptuję') -> None:
+        """
+        Click the cookies consent button. The consent is remembered by the browser, so the button is waited for only
+        once per driver.
+        """
+        if self.consent_accepted:
+            return
+
+        button = self.wait_for_element(By.XPATH, f"//*[text()='{text}']", timeout=self.CONSENT_TIMEOUT)
+        if button is not None:
+            button.click()
+        self.consent_accepted = True
+
     @staticmethod
     def extract_text_from_elements(elements: List[WebElement]) -> List[str]:
         extracted_text = [element.text if element is not None else None for element in elements]
@@ -86,7 +147,8 @@ class SeleniumCommonMethods:
 
     def save_webpage(self, file: str) -> None:
         """
-        Save the current webpage to a HTML file.
+        Save the current webpage to a HTML file. The URL of the page is stored in the first line of the file (as a
+        'saved from url' comment), so the page can be replayed later on by the data extractors.
 
         :param file: a path/file name to which the webpage will be saved.
         :return: None
@@ -95,8 +157,25 @@ class SeleniumCommonMethods:
             file += '.html'
 
         with open(f"{file}", "w+", encoding='utf-8') as f:
+            f.write(f"<!-- saved from url={self.driver.current_url} -->\n")
             f.write(self.driver.page_source)
 
+    def get_next_data(self) -> Union[dict, None]:
+        """
+        Read the state that the Next.js pages embed into the '__NEXT_DATA__' script. The state contains the very same
+        data that is rendered on the page, so it can be read in one go - without scrolling & looking for elements.
+
+        :return: the parsed JSON or None, if the page does not contain the state.
+        """
+        next_data = re.search(r'<script[^>]*id="__NEXT_DATA__"[^>]*>(.*?)</script>', self.driver.page_source, re.DOTALL)
+        if next_data is None:
+            return None
+
+        try:
+            return json.loads(next_data.group(1))
+        except json.JSONDecodeError:
+            return None
+
     @staticmethod
     def sleep_random_seconds(_from: float = 2, to: float = 10) -> None:
         time.sleep(random.uniform(_from, to))
@@ -0,0 +1,123 @@
+from typing import Any, Callable, List, Tuple, Union
+
+import queue
+import threading
+import time
+import uuid
+
+from _common.database_communicator.db_connector import DBConnector
+from _common.database_communicator.pg_copy import copy_rows
+from _common.database_communicator.tables import DataStaging
+from crawler.common.record_batch import RecordBatch
+
+
+class StagingWriter:
+    """
+    Saves the scraped records into the staging table on a background thread, so the crawling never waits for the
+    database. The batches are loaded with 'COPY FROM STDIN' over one long-lived connection.
+
+    The queue is bounded - when the database falls behind, 'submit' blocks instead of piling up the records in memory.
+    An error of the writer is raised on the next 'submit' or on 'close'.
+
+    The staging table numbers the saved rows with the ingest ids by itself, so the data cleaner can take over the rows
+    saved so far while the crawler is still writing. The batch ids only label the batches for the 'on_batch_saved'
+    callback & the logs - they are not saved.
+    """
+    QUEUE_SIZE: int = 10
+
+    def __init__(self, db_connector: DBConnector, on_batch_saved: Callable[[str], None] = None):
+        """
+        :param on_batch_saved: called with the batch id on the writer thread after every saved batch, e.g. to wake up
+        a background cleaner. It has to return at once - the next batches wait for it. Its errors are only printed.
+        """
+        self.db_connector = db_connector
+        self.on_batch_saved = on_batch_saved
+        self.queue = queue.Queue(maxsize=self.QUEUE_SIZE)
+        self.error: Union[Exception, None] = None
+
+        self.writer_id = uuid.uuid4().hex[:12]
+        self.submitted_batches = 0
+
+        self.saved_rows = 0
+        self.saved_batches = 0
+        self.write_seconds = 0.0
+
+        self.thread = threading.Thread(target=self._write_batches, name='staging-writer', daemon=True)
+        self.thread.start()
+
+    def submit(self, records: RecordBatch, on_saved: Callable[[], None] = None) -> None:
+        """
+        :param records: the rows are handed over as they are - the batch must be cleared with 'RecordBatch.clear'
+        (a new list of the rows) before it is filled again.
+        :param on_saved: called on the writer thread once the records are committed (also when there are no records -
+        after all the batches submitted before), e.g. to checkpoint the crawl progress. It is not called when the
+        records could not be saved.
+        """
+        self.raise_error()
+
+        if len(records) or on_saved is not None:
+            batch_id = f'{self.writer_id}-{self.submitted_batches}'
+            self.submitted_batches += 1
+            self.queue.put((batch_id, list(records.columns), records.rows, on_saved))
+
+    def _write_batches(self) -> None:
+        connection = None
+        while True:
+            batch = self.queue.get()
+            try:
+                if batch is None:
+                    break
+                if self.error is None:
+                    connection = self._write_batch(connection, *batch)
+            finally:
+                self.queue.task_done()
+
+        if connection is not None:
+            connection.close()
+
+    def _write_batch(self, connection: Any, batch_id: str, columns: List[str], rows: List[Tuple],
+                     on_saved: Union[Callable[[], None], None]) -> Any:
+        """:return: the connection to be used for the next batches."""
+        start_time = time.perf_counter()
+        try:
+            if rows:
+                if connection is None:
+                    connection = self.db_connector.create_sql_engine().raw_connection()
+                self.saved_rows += copy_rows(connection, DataStaging.__tablename__, columns, rows)
+                connection.commit()
+            if on_saved is not None:
+                on_saved()
+        except Exception as e:
+            self.error = e
+            return connection
+
+        if rows:
+            self.saved_batches += 1
+            self.write_seconds += time.perf_counter() - start_time
+
+            if self.on_batch_saved is not None:
+                try:
+                    self.on_batch_saved(batch_id)
+                except Exception as e:
+                    print(f"Could not process the saved staging batch {batch_id}: {e!r}")
+
+        return connection
+
+    def raise_error(self) -> None:
+        if self.error is not None:
+            raise RuntimeError("Could not save the scraped records into the staging table") from self.error
+
+    def wait_until_saved(self) -> None:
+        """Wait until all the submitted batches are saved, without stopping the writer."""
+        self.queue.join()
+        self.raise_error()
+
+    def close(self) -> None:
+        """Wait until all the submitted batches are saved & close the connection."""
+        if self.thread.is_alive():
+            self.queue.put(None)
+            self.thread.join()
+
+        print(f"Saved {self.saved_rows} staging rows in {self.saved_batches} batches ({self.write_seconds:.1f}s spent "
+              f"on writing in the background)")
+        self.raise_error()
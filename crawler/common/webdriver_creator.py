@@ -4,9 +4,10 @@ import random
 import re
 import os
 from dotenv import load_dotenv
-import subprocess
 
+import psutil
 from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
 from selenium.webdriver.chrome.webdriver import WebDriver
 from selenium.webdriver.chrome.service import Service
 
@@ -20,6 +21,14 @@ class WebdriverCreator:
         'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/99.0.9999.99 Safari/537.36 Edg/99.0.999.99',  # noqa
     ]
     RASPPI_CHROME_WEBDRIVER_PATH: str = '/usr/lib/chromium-browser/chromedriver'
+    BLOCKED_URL_PATTERNS: List[str] = [
+        '*.jpg', '*.jpeg', '*.png', '*.gif', '*.webp', '*.avif', '*.svg', '*.ico',
+        '*.woff', '*.woff2', '*.ttf', '*.otf', '*.mp4', '*.webm',
+        '*googletagmanager.com*', '*google-analytics.com*', '*doubleclick.net*', '*googlesyndication.com*',
+        '*facebook.net*', '*hotjar.com*', '*criteo.com*', '*adnxs.com*',
+    ]
+    RECYCLE_AFTER_PAGES: int = 150
+    RECYCLE_AFTER_RSS_MB: float = 1500
 
     selected_proxy: str = None
     selected_user_agent: str = None
@@ -29,12 +38,15 @@ class WebdriverCreator:
         load_dotenv()
         self.CHECK_API_KEY = os.getenv("CRAWLER_CHECK_API_KEY")
 
+        self.driver_pages = 0
+        self.driver_stats = {'drivers_created': 0, 'restarts': 0, 'pages_per_driver': [], 'peak_rss_mb': 0.0}
+
         self.create_driver()
         # self.check_driver_options()
 
     def create_driver(self):
-        proxy_address = random.choice(self.PROXY_POOL)
-        user_agent = random.choice(self.USER_AGENT_POOL)
+        proxy_address = self._choose_other(self.PROXY_POOL, self.selected_proxy)
+        user_agent = self._choose_other(self.USER_AGENT_POOL, self.selected_user_agent)
 
         chrome_options = webdriver.ChromeOptions()
         # chrome_options.add_argument(f'--proxy-server={proxy_address}')
@@ -48,12 +60,96 @@ class WebdriverCreator:
         driver = webdriver.Chrome(options=chrome_options)
         driver.set_window_size(1920, 1080)
 
+        # The images, fonts & trackers are not needed to read the offers - block them, so the pages load faster
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': self.BLOCKED_URL_PATTERNS})
+
         self.selected_proxy = proxy_address
         self.selected_user_agent = user_agent
         self.driver = driver
+        self.driver_pages = 0
+        self.consent_accepted = False
+        self.driver_stats['drivers_created'] += 1
 
         print(f"Chromium driver created!\nSelected proxy: {proxy_address}\nSelected user-agent: {user_agent}")
 
+    @staticmethod
+    def _choose_other(pool: List[str], current: str) -> str:
+        """Choose a random item of the pool, different to the current one (if the pool allows that)."""
+        candidates = [item for item in pool if item != current] or pool
+        return random.choice(candidates)
+
+    def count_page_load(self) -> None:
+        self.driver_pages += 1
+
+    def get_driver_rss_mb(self) -> float:
+        """Memory used by the chromedriver & all the browser processes started by it."""
+        try:
+            service_process = psutil.Process(self.driver.service.process.pid)
+            processes = [service_process] + service_process.children(recursive=True)
+        except (AttributeError, psutil.Error):
+            return 0.0
+
+        rss = 0
+        for process in processes:
+            try:
+                rss += process.memory_info().rss
+            except psutil.Error:
+                continue
+
+        rss_mb = rss / 1024 ** 2
+        self.driver_stats['peak_rss_mb'] = max(self.driver_stats['peak_rss_mb'], rss_mb)
+        return rss_mb
+
+    def maybe_recycle_driver(self) -> bool:
+        """
+        Replace the driver with a fresh one (with another user-agent/proxy) after it loaded 'RECYCLE_AFTER_PAGES'
+        pages or its memory usage crossed 'RECYCLE_AFTER_RSS_MB'. It should be called only when the state of the
+        browser (opened tabs, current page) can be dropped or restored by the caller.
+
+        :return: whether the driver has been recycled.
+        """
+        rss_mb = self.get_driver_rss_mb()
+        if self.driver_pages < self.RECYCLE_AFTER_PAGES and rss_mb < self.RECYCLE_AFTER_RSS_MB:
+            return False
+
+        print(f"Recycling the driver after {self.driver_pages} pages ({rss_mb:.0f} MB RSS)...")
+        self.quit_driver()
+        self.create_driver()
+        self.driver_stats['restarts'] += 1
+        return True
+
+    def quit_driver(self) -> None:
+        """Quit the driver & make sure that none of the browser processes started by it survives."""
+        if self.driver is None:
+            return
+
+        try:
+            service_process = psutil.Process(self.driver.service.process.pid)
+            processes = [service_process] + service_process.children(recursive=True)
+        except (AttributeError, psutil.Error):
+            processes = []
+
+        self.get_driver_rss_mb()
+        try:
+            self.driver.quit()
+        except WebDriverException as e:
+            print(f"Could not quit the driver gracefully: {e}")
+
+        for process in processes:
+            try:
+                process.kill()
+            except psutil.Error:
+                continue
+
+        self.driver_stats['pages_per_driver'].append(self.driver_pages)
+        self.driver = None
+
+    def report_driver_stats(self) -> None:
+        pages_per_driver = self.driver_stats['pages_per_driver']
+        print(f"Drivers created: {self.driver_stats['drivers_created']}, restarts: {self.driver_stats['restarts']}, "
+              f"pages per driver: {pages_per_driver}, peak RSS: {self.driver_stats['peak_rss_mb']:.0f} MB")
+
     def check_driver_options(self):
         visible_ip_address_request = f'https://api.whatismyip.com/ip.php?key={self.CHECK_API_KEY}&output=json'
         visible_user_agent_request = f'https://api.whatismyip.com/user-agent.php?key={self.CHECK_API_KEY}&output=json'
@@ -79,12 +175,3 @@ class WebdriverCreator:
                              f"Visible user-agent: {user_agent.group(1)}")
 
         print("Visible IP address & user-agent checked - all good!")
-
-    @staticmethod
-    def kill_webdriver_processes():
-        """Since simple self.driver.quit() doesn't work, we kill the processes with the bash commands"""
-        command_1 = 'pkill -f chromedriver'
-        command_2 = 'pkill -f chromium-browse'
-        result_1 = subprocess.run(command_1, shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-        result_2 = subprocess.run(command_2, shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-        print(f'Chrome webdriver has been killed. Return results: {result_1}; {result_2}')
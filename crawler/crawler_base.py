@@ -1,20 +1,52 @@
-from typing import List
+from typing import Callable, List, Dict, Tuple, Type, Union
+
 from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import multiprocessing
+from multiprocessing.util import Finalize
+import os
+import re
+import time
 
 from datetime import datetime
-from dateutil.relativedelta import relativedelta
-import pandas as pd
+from functools import partial
+import requests
 from selenium.webdriver.chrome.webdriver import WebDriver
+from selenium.webdriver.common.by import By
 from selenium.webdriver.remote.webelement import WebElement
+from selenium.webdriver.support import expected_conditions
+from selenium.webdriver.support.wait import WebDriverWait
+from selenium.common.exceptions import TimeoutException
 
 from _common.database_communicator.db_connector import DBConnector
-from _common.database_communicator.tables import DataStaging, DataStagingCols, DataMain
+from _common.database_communicator.tables import DataStagingCols
+from crawler.common.crawl_frontier import CrawlFrontier
+from crawler.common.html_page import HtmlPage
+from crawler.common.http_fetcher import HttpFetcher
+from crawler.common.listing_card import ListingCard
+from crawler.common.page_store import PageStore
+from crawler.common.rate_limiter import (SharedRateLimiterProxy, get_rate_limiter, share_rate_limiter,
+                                         use_rate_limiter)
+from crawler.common.record_batch import RecordBatch
+from crawler.common.seen_url_index import SeenUrlIndex
 from crawler.common.selenium_common_methods import SeleniumCommonMethods
+from crawler.common.staging_writer import StagingWriter
 from crawler.common.webdriver_creator import WebdriverCreator
+from crawler.data_extractors.data_box_parser import DataBoxParser
 
 
 class CrawlerBase(WebdriverCreator, DBConnector, SeleniumCommonMethods, ABC):
     DB_SAVE_THRESHOLD: int = 20
+    EXTRACTION_WORKERS: int = 1
+    FETCH_OFFERS_OVER_HTTP: bool = False
+    STOP_AFTER_SEEN_PAGES: Union[int, None] = None
+    PAGE_STORE_DIR: Union[str, None] = None
+    BLOCKED_PAGE_MARKERS: List[str] = ['captcha', 'just a moment', 'attention required', 'access denied']
+    # The HTTP statuses of the offers removed from the portal - the portal answered properly, there is nothing to slow
+    # down for
+    REMOVED_OFFER_STATUSES: List[int] = [404, 410]
+    LISTING_READY_XPATH: str
+    PAGINATION_TIMEOUT: float = 3
     START_PAGES: List[str]
     driver: WebDriver
 
@@ -23,21 +55,81 @@ class CrawlerBase(WebdriverCreator, DBConnector, SeleniumCommonMethods, ABC):
         WebdriverCreator.__init__(self)
         DBConnector.__init__(self)
 
-        self.main_scraped_urls = None
-        self.seen_records_from_db = {column.key: [] for column in DataStaging.__table__.columns}
-        self.scraped_records = {column.key: [] for column in DataStaging.__table__.columns}
+        self.seen_urls = SeenUrlIndex()
+        self.seen_records_from_db = RecordBatch()
+        self.scraped_records = RecordBatch()
         self.refresh_tries = 1
 
+        self.extraction_pool = None
+        self.pool_start_time = None
+        self.worker_stats = {}
+
+        self.listing_cards: Dict[str, ListingCard] = {}
+        self.frontier: Union[CrawlFrontier, None] = None
+        self.staging_writer: Union[StagingWriter, None] = None
+        # The listing page loaded as a whole document - its embedded listing state is the current one
+        self.loaded_page_url: Union[str, None] = None
+        # The id of the flow run the crawler runs in - a retry of the flow run resumes from the crawl checkpoint
+        self.flow_run_id: Union[str, None] = None
+        # Called with the batch id after every batch saved into the staging table, e.g. to wake up a background cleaner
+        self.on_batch_saved: Union[Callable[[str], None], None] = None
+
+        self.visited_pages = 0
+        self.stopped_start_pages = 0
+        self.skipped_pages = 0
+        self.skipped_offers = 0
+        self.changed_offers = 0
+        self.failed_offers = 0
+
+        self.http_fetcher = HttpFetcher(user_agent=self.selected_user_agent) if self.FETCH_OFFERS_OVER_HTTP else None
+        self.page_store = PageStore(self.PAGE_STORE_DIR) if self.PAGE_STORE_DIR else None
+        self.rate_limiter = get_rate_limiter()
+
     def scrape(self) -> None:
         already_scraped_urls = self.get_already_scraped_urls()
+        self.frontier = CrawlFrontier.load(self.__class__.__name__, flow_run_id=self.flow_run_id)
+        self.staging_writer = StagingWriter(self, on_batch_saved=self.on_batch_saved)
+        self.start_extraction_workers()
+        try:
+            self._scrape_start_pages(already_scraped_urls)
+            self.frontier.complete()
+            self.rate_limiter.report_stats()
+            self.report_wait_timings()
+            DataBoxParser.report_unknown_labels()
+            print(f"Visited {self.visited_pages} listing pages; skipped {self.skipped_offers} offer fetches of already "
+                  f"scraped offers & stopped paginating early on {self.stopped_start_pages} start pages, skipping "
+                  f"{self.skipped_pages} listing pages; re-scraped "
+                  f"{self.changed_offers} offers with changed listing cards; could not fetch {self.failed_offers} "
+                  f"offers")
+        finally:
+            self.stop_extraction_workers()
+            self.staging_writer.close()
+            if self.http_fetcher is not None:
+                self.http_fetcher.close()
+            if self.page_store is not None:
+                self.page_store.close()
+                self.page_store.apply_retention()
+
+    def _scrape_start_pages(self, already_scraped_urls: SeenUrlIndex) -> None:
+        for start_page_index, start_page in enumerate(self.START_PAGES):
+            if start_page_index < self.frontier.start_page_index:
+                print(f"Skipping the start page already scraped before the restart: {start_page}")
+                continue
 
-        for start_page in self.START_PAGES:
-            self.enter_start_page(url=start_page)
-            print(f"Successfully entered the start page: {start_page}")
-
-            page_counter = 1
+            pending_offer_urls = []
+            if self.frontier.is_resumed_start_page(start_page_index):
+                self.enter_start_page(url=self.frontier.page_url)
+                page_counter = self.frontier.page_number
+                pending_offer_urls = self.frontier.pending_offers()
+                print(f"Successfully re-entered the page number {page_counter} of the start page: {start_page}")
+            else:
+                self.enter_start_page(url=start_page)
+                page_counter = 1
+                print(f"Successfully entered the start page: {start_page}")
+
+            pages_without_new_offers = 0
             while True:
-                self.scroll_to_the_bottom()
+                self.recycle_driver_on_listing_page()
                 next_page_arrow = self.get_next_page_arrow()
                 offer_urls = self.get_offer_urls(already_scraped_urls)
 
@@ -45,78 +137,382 @@ class CrawlerBase(WebdriverCreator, DBConnector, SeleniumCommonMethods, ABC):
                 if offer_urls is False and not isinstance(offer_urls, list):
                     continue
 
+                # The offers queued before the restart go first; they may be also found on the page once again
+                offer_urls = pending_offer_urls + [url for url in offer_urls if url not in pending_offer_urls]
+                pending_offer_urls = []
+                self.frontier.begin_page(start_page_index, self.driver.current_url, page_counter, offer_urls)
+
+                self.visited_pages += 1
+                self.count_page_load()
                 print(f"Found {len(offer_urls)} offers to scrape on the page number {page_counter}. Extracting the "
                       f"data...")
-                self.open_new_tab()
-
-                for offer_url in offer_urls:
-                    self.driver.get(offer_url)
-                    self.sleep_random_seconds()
-                    self.extract_data_from_offer(offer_url)
-                    self.check_if_save_threshold_reached()
-
-                self.close_active_tab()
+                self.extract_offers(offer_urls)
                 print(f"Successfully scraped all offers from the page number {page_counter}. Continuing...")
 
+                pages_without_new_offers = 0 if offer_urls else pages_without_new_offers + 1
+                if next_page_arrow and self.check_if_stop_paginating(pages_without_new_offers):
+                    total_pages = self.get_total_pages()
+                    remaining_pages = max(total_pages - page_counter, 0) if total_pages is not None else None
+                    print(f"There were no new offers on the last {pages_without_new_offers} pages. The start page is "
+                          f"sorted from the newest offers, so the pagination stops at the page number {page_counter}. "
+                          f"The remaining {remaining_pages if remaining_pages is not None else 'unknown number of'} "
+                          f"pages are left for the seen offers sweep")
+                    self.stopped_start_pages += 1
+                    self.skipped_pages += remaining_pages or 0
+                    next_page_arrow = None
+
                 if next_page_arrow:
-                    self.scroll_until(element=next_page_arrow)
-                    next_page_arrow.click()
+                    self.go_to_next_page(next_page_arrow)
                     page_counter += 1
                     continue
 
                 self.save_and_clear_scraped_records()
+                # The offers of the start page are dropped from the frontier - only after their records are saved
+                self.staging_writer.wait_until_saved()
+                self.frontier.finish_start_page(start_page_index)
                 print("Successfully ran through all the offers from all pages for a given start page!")
                 break
 
-    def save_and_clear_scraped_records(self) -> None:
-        sql_engine = self.create_sql_engine()
+    def enter_start_page(self, url: str) -> None:
+        self.driver.get(url)
+        self.loaded_page_url = self.driver.current_url
+        self.accept_consent()
+        self.wait_until_listing_ready()
+
+    def wait_until_listing_ready(self, previous_card: Union[WebElement, None] = None) -> None:
+        """
+        Wait for the offer cards of the listing page.
+
+        :param previous_card: an offer card of the previous page - it is waited to be removed first, otherwise the
+        cards of the previous page would be 'ready' right away.
+        """
+        if previous_card is not None:
+            try:
+                WebDriverWait(self.driver, self.WAIT_TIMEOUT, poll_frequency=0.1).until(
+                    expected_conditions.staleness_of(previous_card)
+                )
+            except TimeoutException:
+                print(f"The offer cards of the previous page are still shown after {self.WAIT_TIMEOUT}s")
+
+        if self.wait_for_element(By.XPATH, self.LISTING_READY_XPATH) is None:
+            print(f"The listing page has not been loaded in {self.WAIT_TIMEOUT}s: {self.driver.current_url}")
+
+    def go_to_next_page(self, next_page_arrow: WebElement) -> None:
+        """
+        Load the next listing page as a whole document, so the listing state embedded in the page describes this very
+        page - after a click, the portals switch the pages on the client side & keep the state of the page the browser
+        entered first. The arrow is clicked only when the URL of the next page is not known.
+        """
+        previous_card = self._find_element(By.XPATH, self.LISTING_READY_XPATH)
+        next_page_url = self.get_next_page_url(next_page_arrow)
+        if next_page_url is None:
+            self.click_next_page_arrow(next_page_arrow, previous_card)
+            return
+
+        with self.rate_limiter.request_slot(next_page_url):
+            self.driver.get(next_page_url)
+            self.loaded_page_url = self.driver.current_url
+            self.wait_until_listing_ready(previous_card)
+
+    def get_next_page_url(self, next_page_arrow: WebElement) -> Union[str, None]:
+        """:return: the link of the next page arrow (or of the link inside the arrow), None if it is not a link."""
+        next_page_url = next_page_arrow.get_attribute('href')
+        if next_page_url:
+            return next_page_url
+
+        links = next_page_arrow.find_elements(By.XPATH, './/a[@href]')
+        return links[0].get_attribute('href') if links else None
+
+    def click_next_page_arrow(self, next_page_arrow: WebElement, previous_card: Union[WebElement, None]) -> None:
+        """
+        Click the next page arrow & wait until the next page is shown. The page is switched without reloading the
+        whole document, so the URL change & the removal of the previous cards are waited for first.
+        """
+        self.scroll_until(element=next_page_arrow)
+        with self.rate_limiter.request_slot(self.driver.current_url):
+            previous_url = self.driver.current_url
+            next_page_arrow.click()
+            try:
+                WebDriverWait(self.driver, self.WAIT_TIMEOUT, poll_frequency=0.1).until(
+                    expected_conditions.url_changes(previous_url)
+                )
+            except TimeoutException:
+                print(f"The URL has not changed in {self.WAIT_TIMEOUT}s after clicking the next page arrow")
+            self.wait_until_listing_ready(previous_card)
+
+    def recycle_driver_on_listing_page(self) -> None:
+        """The listing page is the only browser state worth keeping - it is re-entered with the recycled driver."""
+        listing_page_url = self.driver.current_url
+        if self.maybe_recycle_driver():
+            self.enter_start_page(url=listing_page_url)
+
+    def get_total_pages(self) -> Union[int, None]:
+        """
+        :return: the number of the listing pages of the start page, read from the listing state embedded in the page,
+        or None when it's not known.
+        """
+        return None
+
+    def check_if_stop_paginating(self, pages_without_new_offers: int) -> bool:
+        """
+        Incremental crawling: the start pages are sorted from the newest offers, so after a few pages with only already
+        scraped offers, the remaining pages are very unlikely to contain anything new.
+        """
+        if self.STOP_AFTER_SEEN_PAGES is None:
+            return False
+        return pages_without_new_offers >= self.STOP_AFTER_SEEN_PAGES
+
+    def sweep_seen_offers(self) -> None:
+        """
+        Walk through all the listing pages without entering any offer, only to mark the offers that are already in the
+        database as seen (so the data cleaner updates their 'last_time_seen'). It's a cheap complement of the
+        incremental crawling, that does not reach the last listing pages.
+        """
+        already_scraped_urls = self.get_already_scraped_urls()
+        self.staging_writer = StagingWriter(self, on_batch_saved=self.on_batch_saved)
+        try:
+            self._sweep_start_pages(already_scraped_urls)
+        finally:
+            self.staging_writer.close()
 
-        new_records = pd.DataFrame(self.scraped_records)
-        new_records.to_sql(DataStaging.__tablename__, con=sql_engine, if_exists='append', index=False)
+    def _sweep_start_pages(self, already_scraped_urls: SeenUrlIndex) -> None:
+        for start_page in self.START_PAGES:
+            self.enter_start_page(url=start_page)
+            print(f"Successfully entered the start page: {start_page}. Sweeping the seen offers...")
 
-        # Add the records that are already in the database as rows with only URLs. Thanks to that, the data cleaner will
-        # update the 'last_seen_date' for existing records.
-        hm_seen_records = len(self.seen_records_from_db[DataStagingCols.URL])
-        for key in self.seen_records_from_db.keys():
-            if key == DataStagingCols.URL:
+            hm_seen_offers = 0
+            while True:
+                self.recycle_driver_on_listing_page()
+                next_page_arrow = self.get_next_page_arrow()
+                offer_hrefs = self.get_offer_hrefs()
+                if offer_hrefs is False and not isinstance(offer_hrefs, list):
+                    continue
+
+                for href in offer_hrefs:
+                    if already_scraped_urls.is_in_main(href):
+                        self.seen_records_from_db.append({DataStagingCols.URL: href})
+                        hm_seen_offers += 1
+
+                if next_page_arrow:
+                    self.go_to_next_page(next_page_arrow)
+                    continue
+
+                self.save_and_clear_scraped_records()
+                print(f"Swept all pages of the start page & marked {hm_seen_offers} offers as seen")
+                break
+
+    def get_offer_urls(self, already_scraped_urls: SeenUrlIndex) -> Union[List[str], bool]:
+        offer_hrefs = self.get_offer_hrefs()
+        if offer_hrefs is False and not isinstance(offer_hrefs, list):
+            return False
+
+        offer_urls = []
+        for href in offer_hrefs:
+            if self.check_if_listing_card_changed(href, already_scraped_urls):
+                self.changed_offers += 1
+                offer_urls.append(href)
+                continue
+            if already_scraped_urls.is_in_main(href):
+                self.seen_records_from_db.append({DataStagingCols.URL: href})
+                self.skipped_offers += 1
+                continue
+            if href in already_scraped_urls:
+                self.skipped_offers += 1
                 continue
-            self.seen_records_from_db[key] = [None] * hm_seen_records
 
-        seen_records = pd.DataFrame(self.seen_records_from_db)
-        if not seen_records.empty:
-            seen_records.to_sql(DataStaging.__tablename__, con=sql_engine, if_exists='append', index=False)
+            already_scraped_urls.add(href)
+            offer_urls.append(href)
 
-        for key in self.scraped_records.keys():
-            self.scraped_records[key].clear()
+        return offer_urls
 
-        for key in self.seen_records_from_db.keys():
-            self.seen_records_from_db[key].clear()
+    def check_if_listing_card_changed(self, href: str, already_scraped_urls: SeenUrlIndex) -> bool:
+        """
+        Compare the fingerprint of the listing card with the one of the values stored in the database. Only the offers
+        that changed are scraped once again - the rest costs nothing more than reading the listing page.
+        """
+        card = self.listing_cards.get(href)
+        if card is None or card.price is None or not already_scraped_urls.is_in_main(href):
+            return False
 
-    def check_if_save_threshold_reached(self) -> None:
-        if len(self.scraped_records['url']) == self.DB_SAVE_THRESHOLD:
-            print(f"Scraped {self.DB_SAVE_THRESHOLD} offers & matched the database save threshold. "
-                  f"Saving the data into the database and proceeding...")
-            self.save_and_clear_scraped_records()
+        fingerprint = card.fingerprint()
+        if not already_scraped_urls.has_changed(href, fingerprint):
+            return False
+
+        # The offer is going to be scraped - it should not be picked up again, if it's shown on another page as well
+        already_scraped_urls.update_fingerprint(href, fingerprint)
+        return True
+
+    def get_offer_hrefs(self) -> Union[List[str], bool]:
+        """
+        Collect the links of the offers listed on the current page. The listing state embedded in the page is read
+        first; the page is scrolled & searched for the offer elements only when the state is not available.
+
+        :return: the offer URLs, or False when the offers were not loaded properly & the page has to be read again.
+        """
+        listing_cards = None
+        # A page switched on the client side keeps the embedded state of the page the browser loaded as a document
+        if self.driver.current_url == self.loaded_page_url:
+            listing_cards = self.get_listing_cards()
+
+        if listing_cards is None:
+            print("Could not read the listing state embedded in the page. Looking for the offers in the page elements")
+            self.listing_cards = {}
+            self.scroll_to_the_bottom()
+            return self.get_offer_hrefs_from_dom()
+
+        # All the listed items are checked - a page of only e.g. the investments is loaded properly, it has no offers
+        if not self.check_if_offers_loaded_properly(listing_cards):
+            return False
 
-    def get_already_scraped_urls(self) -> List[str]:
-        cut_date = datetime.today() - relativedelta(weeks=4)
+        self.listing_cards = {card.url: card for card in listing_cards if card.to_scrape}
+        return list(self.listing_cards.keys())
 
-        session = self.create_session()
-        staging_scraped_urls = session.query(DataStaging.url).all()
-        main_scraped_urls = session.query(DataMain.url).where(DataMain.last_time_seen > cut_date).all()
-        session.close()
+    def extract_offers(self, offer_urls: List[str]) -> None:
+        if self.extraction_pool is None:
+            if not self.FETCH_OFFERS_OVER_HTTP:
+                self.open_new_tab()
+            for offer_url in offer_urls:
+                self.frontier.mark_in_flight(offer_url)
+                self.scrape_offer(offer_url)
+                self.frontier.mark_extracted(offer_url)
+                self.check_if_save_threshold_reached()
+            if not self.FETCH_OFFERS_OVER_HTTP:
+                self.close_active_tab()
+            return
+
+        futures = {}
+        for offer_url in offer_urls:
+            self.frontier.mark_in_flight(offer_url)
+            futures[self.extraction_pool.submit(_extract_offer_in_worker, offer_url)] = offer_url
+
+        for future in as_completed(futures):
+            worker_pid, records, failed_offers, busy_seconds = future.result()
+            self.frontier.mark_extracted(futures[future])
+            self.merge_scraped_records(records)
+            self.failed_offers += failed_offers
+            self.update_worker_stats(worker_pid, busy_seconds)
+            self.check_if_save_threshold_reached()
+
+    def scrape_offer(self, offer_url: str) -> None:
+        page = self.load_offer_page(offer_url)
+        if page is None:
+            return
+        self.extract_data_from_offer(offer_url, page)
+
+    def load_offer_page(self, offer_url: str) -> Union[WebDriver, HtmlPage, None]:
+        """
+        Load the offer page either in the browser or, when the 'FETCH_OFFERS_OVER_HTTP' switch is on, with a plain HTTP
+        request. The returned object is passed to the data extractor - both of them can be searched with XPaths.
+
+        :return: the page, or None when the HTTP request failed (an error status, also after the fetcher's retries, or
+        a connection error). The offer is skipped then, instead of failing the whole crawl - it's not saved, so the next
+        run picks it up again.
+        """
+        with self.rate_limiter.request_slot(offer_url) as outcome:
+            if self.FETCH_OFFERS_OVER_HTTP:
+                try:
+                    page = self.http_fetcher.fetch(offer_url)
+                except requests.RequestException as e:
+                    status = e.response.status_code if e.response is not None else None
+                    outcome.blocked = status not in self.REMOVED_OFFER_STATUSES
+                    self.failed_offers += 1
+                    print(f"Could not fetch the offer {offer_url} ({status or type(e).__name__}) - skipping it")
+                    return None
+            else:
+                self.driver.get(offer_url)
+                self.count_page_load()
+                page = self.driver
+            outcome.blocked = self.check_if_blocked(page)
+
+        if self.page_store is not None:
+            self.page_store.put_async(offer_url, page.page_source)
+
+        return page
+
+    def check_if_blocked(self, page: Union[WebDriver, HtmlPage]) -> bool:
+        """Whether the portal served a captcha/anti-bot page instead of the requested one."""
+        title = re.search(r'<title[^>]*>(.*?)</title>', page.page_source, re.DOTALL | re.IGNORECASE)
+        if title is None:
+            return False
+        return any(marker in title.group(1).lower() for marker in self.BLOCKED_PAGE_MARKERS)
+
+    def start_extraction_workers(self) -> None:
+        """
+        Start a pool of processes that extract the data from offers concurrently, while this instance only walks
+        through the listing pages. Every worker process creates its own crawler instance (and so, its own webdriver).
+        Nothing is started when the 'EXTRACTION_WORKERS' is lower than 2 - then the offers are scraped serially.
+
+        The rate limiter is moved into a manager process & shared by this instance & all the workers, so the request
+        rate of a domain is limited for all of them together, while the pages are loaded & extracted concurrently.
+        """
+        if self.EXTRACTION_WORKERS < 2:
+            return
+
+        mp_context = multiprocessing.get_context('spawn')
+        self.rate_limiter = share_rate_limiter(mp_context)
+        self.worker_stats = {}
+        self.extraction_pool = ProcessPoolExecutor(
+            max_workers=self.EXTRACTION_WORKERS, mp_context=mp_context,
+            initializer=_init_extraction_worker, initargs=(self.__class__, self.rate_limiter)
+        )
+        self.pool_start_time = time.perf_counter()
+        print(f"Started {self.EXTRACTION_WORKERS} extraction workers")
+
+    def stop_extraction_workers(self) -> None:
+        if self.extraction_pool is None:
+            return
+
+        self.extraction_pool.shutdown(wait=True, cancel_futures=True)
+        self.extraction_pool = None
+        self.report_worker_stats()
+
+    def merge_scraped_records(self, records: RecordBatch) -> None:
+        self.scraped_records.extend(records)
+
+    def update_worker_stats(self, worker_pid: int, busy_seconds: float) -> None:
+        stats = self.worker_stats.setdefault(worker_pid, {'offers': 0, 'busy_seconds': 0.0})
+        stats['offers'] += 1
+        stats['busy_seconds'] += busy_seconds
+
+    def report_worker_stats(self) -> None:
+        wall_seconds = time.perf_counter() - self.pool_start_time
+        total_offers = sum(stats['offers'] for stats in self.worker_stats.values())
+        print(f"Extraction workers scraped {total_offers} offers in {wall_seconds:.0f}s "
+              f"({60 * total_offers / max(wall_seconds, 1e-9):.1f} offers/min)")
+
+        for worker_pid, stats in self.worker_stats.items():
+            offers_per_minute = 60 * stats['offers'] / max(stats['busy_seconds'], 1e-9)
+            print(f"  worker {worker_pid}: {stats['offers']} offers, {stats['busy_seconds']:.0f}s busy, "
+                  f"{offers_per_minute:.1f} offers/min")
 
-        if not staging_scraped_urls:
-            staging_scraped_urls = []
-        if not main_scraped_urls:
-            main_scraped_urls = []
+    def save_and_clear_scraped_records(self) -> None:
+        """
+        Hand the records over to the background staging writer & clear them, so the scraping can go on at once. The
+        offers are marked as saved in the crawl frontier by the writer, only after their records are committed.
+        """
+        on_saved = None
+        if self.frontier is not None:
+            on_saved = partial(self.frontier.mark_saved, self.frontier.extracted_offers())
+        self.staging_writer.submit(self.scraped_records, on_saved=on_saved)
 
-        staging_scraped_urls = [url[0] for url in staging_scraped_urls]
-        main_scraped_urls = [url[0] for url in main_scraped_urls]
-        scraped_urls = staging_scraped_urls + main_scraped_urls
+        # Add the records that are already in the database as rows with only URLs. Thanks to that, the data cleaner will
+        # update the 'last_seen_date' for existing records.
+        self.staging_writer.submit(self.seen_records_from_db)
 
-        self.main_scraped_urls = main_scraped_urls
-        return scraped_urls
+        self.scraped_records.clear()
+        self.seen_records_from_db.clear()
+
+    def check_if_save_threshold_reached(self) -> None:
+        if len(self.scraped_records) >= self.DB_SAVE_THRESHOLD:
+            print(f"Scraped {len(self.scraped_records)} offers & matched the database save threshold. "
+                  f"Saving the data into the database and proceeding...")
+            self.save_and_clear_scraped_records()
+
+    def get_already_scraped_urls(self) -> SeenUrlIndex:
+        with self.session_scope() as session:
+            self.seen_urls.refresh(session)
+
+        return self.seen_urls
 
     def check_if_offers_loaded_properly(self, offer_urls) -> bool:
         if not offer_urls:
@@ -125,8 +521,10 @@ class CrawlerBase(WebdriverCreator, DBConnector, SeleniumCommonMethods, ABC):
 
             mirror_path = f'./crawler/mirrors/{datetime.now().strftime("%Y_%m_%d___%H%M%S")}_offers_load_issue.html'
             self.save_webpage(file=mirror_path)
-            self.sleep_random_seconds(_from=15, to=45)
-            self.driver.refresh()
+            self.rate_limiter.report(self.driver.current_url, response_seconds=0, ok=False)
+            with self.rate_limiter.request_slot(self.driver.current_url):
+                self.driver.refresh()
+                self.loaded_page_url = self.driver.current_url
             self.refresh_tries += 1
             if self.refresh_tries > 5:
                 raise TimeoutError(f"Can not load the offers. Tried {self.refresh_tries} refreshes and still no "
@@ -135,17 +533,54 @@ class CrawlerBase(WebdriverCreator, DBConnector, SeleniumCommonMethods, ABC):
         return True
 
     @abstractmethod
-    def enter_start_page(self, url: str) -> None:
+    def get_next_page_arrow(self) -> WebElement:
         raise NotImplementedError
 
     @abstractmethod
-    def get_next_page_arrow(self) -> WebElement:
+    def get_listing_cards(self) -> Union[List[ListingCard], None]:
+        """
+        Read the offers listed on the current page from the listing state embedded in the page.
+
+        :return: the cards of all the listed items - the ones that are not scraped are marked with 'to_scrape' - or None
+        when the state is missing/has an unknown structure.
+        """
         raise NotImplementedError
 
     @abstractmethod
-    def get_offer_urls(self, already_scraped_urls: List[str]) -> List[str]:
+    def get_offer_hrefs_from_dom(self) -> Union[List[str], bool]:
         raise NotImplementedError
 
     @abstractmethod
-    def extract_data_from_offer(self, offer_url: str) -> None:
+    def extract_data_from_offer(self, offer_url: str, page: Union[WebDriver, HtmlPage]) -> None:
         raise NotImplementedError
+
+
+_worker_crawler: CrawlerBase = None
+
+
+def _init_extraction_worker(crawler_class: Type[CrawlerBase], rate_limiter: SharedRateLimiterProxy) -> None:
+    global _worker_crawler
+
+    use_rate_limiter(rate_limiter)
+
+    crawler = crawler_class()
+    Finalize(crawler, crawler.quit_driver, exitpriority=10)
+    Finalize(crawler, crawler.report_wait_timings, exitpriority=10)
+    Finalize(crawler, DataBoxParser.report_unknown_labels, exitpriority=10)
+    if crawler.page_store is not None:
+        Finalize(crawler, crawler.page_store.close, exitpriority=10)
+    _worker_crawler = crawler
+
+
+def _extract_offer_in_worker(offer_url: str) -> Tuple[int, RecordBatch, int, float]:
+    start_time = time.perf_counter()
+    _worker_crawler.scrape_offer(offer_url)
+    _worker_crawler.maybe_recycle_driver()
+    busy_seconds = time.perf_counter() - start_time
+
+    records = _worker_crawler.scraped_records
+    _worker_crawler.scraped_records = RecordBatch()
+    failed_offers = _worker_crawler.failed_offers
+    _worker_crawler.failed_offers = 0
+
+    return os.getpid(), records, failed_offers, busy_seconds
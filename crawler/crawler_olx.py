@@ -1,52 +1,83 @@
 from typing import List, Union
 
+import json
+import re
+
+from selenium.webdriver.chrome.webdriver import WebDriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.remote.webelement import WebElement
 
-from _common.database_communicator.tables import DataStagingCols
+from crawler.common.html_page import HtmlPage
+from crawler.common.listing_card import ListingCard
 from crawler.crawler_base import CrawlerBase
 from crawler.data_extractors.extractor_olx import DataExtractorOLX
 
 
 class CrawlerOLX(CrawlerBase):
+    LISTING_READY_XPATH = "//a[@class='css-rc5s2u']"
     START_PAGES = ['https://www.olx.pl/nieruchomosci/mieszkania/sprzedaz/poznan/q-nieruchomości/',
                    'https://www.olx.pl/nieruchomosci/domy/sprzedaz/poznan/q-nieruchomości/']
 
     def __init__(self):
         super().__init__()
 
-    def enter_start_page(self, url: str) -> None:
-        self.driver.get(url)
-        self.sleep_random_seconds(_from=2, to=4)
-        self.click_button_with_text(text='Akceptuję')
-
     def get_next_page_arrow(self) -> WebElement:
-        return self._find_element(By.XPATH, "//a[@data-testid='pagination-forward']")
+        return self.wait_for_element(By.XPATH, "//a[@data-testid='pagination-forward']",
+                                     timeout=self.PAGINATION_TIMEOUT)
+
+    def get_listing_state(self) -> Union[dict, None]:
+        # OLX is not a Next.js page - the listing state is assigned to a global variable as a JSON-encoded string
+        state = re.search(r'window\.__PRERENDERED_STATE__\s*=\s*("(?:[^"\\]|\\.)*")', self.driver.page_source)
+        try:
+            return json.loads(json.loads(state.group(1)))['listing']['listing']
+        except (AttributeError, KeyError, TypeError, json.JSONDecodeError):
+            return None
+
+    def get_total_pages(self) -> Union[int, None]:
+        # The number of the pages is the same in the state of every page of the listing
+        try:
+            return int(self.get_listing_state()['totalPages'])
+        except (KeyError, TypeError, ValueError):
+            return None
+
+    def get_listing_cards(self) -> Union[List[ListingCard], None]:
+        try:
+            ads = self.get_listing_state()['ads']
+        except (KeyError, TypeError):
+            return None
 
-    def get_offer_urls(self, already_scraped_urls: List[str]) -> Union[List[str], bool]:
+        listing_cards = []
+        for ad in ads:
+            params = {param.get('key'): param.get('normalizedValue') for param in ad.get('params') or []}
+            regular_price = (ad.get('price') or {}).get('regularPrice') or {}
+            listing_cards.append(ListingCard(
+                url=ad['url'],
+                price=ListingCard.to_float(regular_price.get('value')),
+                size=ListingCard.to_float(params.get('m')),
+                rooms=ListingCard.to_rooms(params.get('rooms')),
+                to_scrape='otodom' not in ad['url']
+            ))
+
+        return listing_cards
+
+    def get_offer_hrefs_from_dom(self) -> Union[List[str], bool]:
         offers = self.driver.find_elements(By.XPATH, "//a[@class='css-rc5s2u']")
         if not self.check_if_offers_loaded_properly(offers):
             return False
 
-        offer_urls = []
+        offer_hrefs = []
         for offer in offers:
             href = offer.get_property('href')
-
             if 'otodom' in href:
                 continue
-            if href in self.main_scraped_urls:
-                self.seen_records_from_db[DataStagingCols.URL].append(href)
-                continue
-            if href in already_scraped_urls:
-                continue
 
-            offer_urls.append(href)
+            offer_hrefs.append(href)
 
-        return offer_urls
+        return offer_hrefs
 
-    def extract_data_from_offer(self, offer_url: str) -> None:
+    def extract_data_from_offer(self, offer_url: str, page: Union[WebDriver, HtmlPage]) -> None:
         if 'olx' in offer_url:
-            extractor = DataExtractorOLX(self.driver, self.scraped_records, page_to_extract_url=offer_url)
+            extractor = DataExtractorOLX(page, self.scraped_records, page_to_extract_url=offer_url)
         else:
             raise ValueError(f"Unknown domain for data extraction: {offer_url}")
 
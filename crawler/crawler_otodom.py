@@ -1,14 +1,21 @@
 from typing import List, Union
 
+from urllib.parse import parse_qs, urlencode, urlparse
+
+from selenium.webdriver.chrome.webdriver import WebDriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.remote.webelement import WebElement
 
-from _common.database_communicator.tables import DataStagingCols
+from crawler.common.html_page import HtmlPage
+from crawler.common.listing_card import ListingCard
 from crawler.crawler_base import CrawlerBase
 from crawler.data_extractors.extractor_otodom import DataExtractorOTODOM
 
 
 class CrawlerOTODOM(CrawlerBase):
+    STOP_AFTER_SEEN_PAGES = 3
+    OFFER_URL_TEMPLATE = 'https://www.otodom.pl/pl/oferta/{slug}'
+    LISTING_READY_XPATH = "//a[@data-cy='listing-item-link'] | //a[@class='css-16vl3c1 e1njvixn0']"
     START_PAGES = ['https://www.otodom.pl/pl/wyniki/sprzedaz/mieszkanie/wielkopolskie/poznan/poznan/poznan?limit=36&' +
                    'ownerTypeSingleSelect=ALL&daysSinceCreated=7&by=DEFAULT&direction=DESC&viewType=listing',
                    'https://www.otodom.pl/pl/wyniki/sprzedaz/dom/wielkopolskie/poznan/poznan/poznan?distanceRadius=0&' +
@@ -17,13 +24,8 @@ class CrawlerOTODOM(CrawlerBase):
     def __init__(self):
         super().__init__()
 
-    def enter_start_page(self, url: str) -> None:
-        self.driver.get(url)
-        self.sleep_random_seconds(_from=2, to=4)
-        self.click_button_with_text(text='Akceptuję')
-
     def get_next_page_arrow(self) -> WebElement:
-        button = self._find_element(By.XPATH, "//li[@title='Go to next Page']")
+        button = self.wait_for_element(By.XPATH, "//li[@title='Go to next Page']", timeout=self.PAGINATION_TIMEOUT)
 
         # Old OTODOM version, perhaps will be removed completely by the developers in the nearest future
         if button is None:
@@ -40,7 +42,46 @@ class CrawlerOTODOM(CrawlerBase):
 
         return button
 
-    def get_offer_urls(self, already_scraped_urls: List[str]) -> Union[List[str], bool]:
+    def get_next_page_url(self, next_page_arrow: WebElement) -> Union[str, None]:
+        next_page_url = super().get_next_page_url(next_page_arrow)
+        if next_page_url is not None:
+            return next_page_url
+
+        # The arrow of the new pagination is not a link - the page number is a query parameter of the listing URL
+        url = urlparse(self.driver.current_url)
+        query = parse_qs(url.query)
+        query['page'] = [str(int(query.get('page', ['1'])[0]) + 1)]
+        return url._replace(query=urlencode(query, doseq=True)).geturl()
+
+    def get_total_pages(self) -> Union[int, None]:
+        # The number of the pages is the same in the state of every page of the listing, also of a page switched on
+        # the client side
+        try:
+            return int(self.get_next_data()['props']['pageProps']['data']['searchAds']['pagination']['totalPages'])
+        except (KeyError, TypeError, ValueError):
+            return None
+
+    def get_listing_cards(self) -> Union[List[ListingCard], None]:
+        next_data = self.get_next_data()
+        try:
+            items = next_data['props']['pageProps']['data']['searchAds']['items']
+        except (KeyError, TypeError):
+            return None
+
+        listing_cards = []
+        for item in items:
+            total_price = item.get('totalPrice') or {}
+            listing_cards.append(ListingCard(
+                url=self.OFFER_URL_TEMPLATE.format(slug=item['slug']),
+                price=ListingCard.to_float(total_price.get('value')),
+                size=ListingCard.to_float(item.get('areaInSquareMeters')),
+                rooms=ListingCard.to_rooms(item.get('roomsNumber')),
+                to_scrape=item.get('estate') != 'INVESTMENT' and '/inwestycja/' not in str(item.get('href'))
+            ))
+
+        return listing_cards
+
+    def get_offer_hrefs_from_dom(self) -> Union[List[str], bool]:
         offers = self.driver.find_elements(By.XPATH, "//a[@class='css-16vl3c1 e1njvixn0']")
 
         # Old OTODOM version, perhaps will be removed completely by the developers in the nearest future
@@ -52,25 +93,19 @@ class CrawlerOTODOM(CrawlerBase):
         if not self.check_if_offers_loaded_properly(offers):
             return False
 
-        offer_urls = []
+        offer_hrefs = []
         for offer in offers:
             href = offer.get_property('href')
             if '/inwestycja/' in href:
                 continue
 
-            if href in self.main_scraped_urls:
-                self.seen_records_from_db[DataStagingCols.URL].append(href)
-                continue
-            if href in already_scraped_urls:
-                continue
-
-            offer_urls.append(href)
+            offer_hrefs.append(href)
 
-        return offer_urls
+        return offer_hrefs
 
-    def extract_data_from_offer(self, offer_url: str) -> None:
+    def extract_data_from_offer(self, offer_url: str, page: Union[WebDriver, HtmlPage]) -> None:
         if 'otodom' in offer_url:
-            extractor = DataExtractorOTODOM(self.driver, self.scraped_records, page_to_extract_url=offer_url)
+            extractor = DataExtractorOTODOM(page, self.scraped_records, page_to_extract_url=offer_url)
         else:
             raise ValueError(f"Unknown domain for data extraction: {offer_url}")
 
@@ -0,0 +1,54 @@
+import threading
+
+from crawler.data_cleaner.data_cleaner import DataCleaner
+
+
+class BackgroundCleaner:
+    """
+    Cleans the staging data on its own thread while the crawler goes on, so neither the crawling nor the saving of the
+    records waits for the cleaning.
+
+    A cleaning starts after a batch was saved (see 'notify'), but not more often than every INTERVAL_SECONDS - one
+    cleaning takes over all the batches saved in the meantime, so a few batches saved at once are cleaned together.
+    """
+    INTERVAL_SECONDS: float = 60
+
+    def __init__(self, data_cleaner: DataCleaner):
+        self.data_cleaner = data_cleaner
+        self.batches_saved = threading.Event()
+        self.stopped = threading.Event()
+        self.cleanings = 0
+
+        self.thread = threading.Thread(target=self._clean_saved_batches, name='background-cleaner', daemon=True)
+        self.thread.start()
+
+    def notify(self, batch_id: str) -> None:
+        """Called (on the staging writer's thread) after every saved batch - it only wakes the cleaner up."""
+        self.batches_saved.set()
+
+    def _clean_saved_batches(self) -> None:
+        while True:
+            self.batches_saved.wait()
+            if self.stopped.is_set():
+                break
+            self.batches_saved.clear()
+
+            try:
+                self.data_cleaner.clean_and_save_data()
+                self.cleanings += 1
+            except Exception as e:
+                # The rows wait in the staging table for the next cleaning
+                print(f"Could not clean the saved staging batches: {e!r}")
+
+            if self.stopped.wait(self.INTERVAL_SECONDS):
+                break
+
+    def stop(self) -> None:
+        """
+        Stop the cleaner after the running cleaning (if any). The batches saved after the last cleaning are left for the
+        next one, e.g. the 'clean_data' task.
+        """
+        self.stopped.set()
+        self.batches_saved.set()
+        self.thread.join()
+        print(f"Cleaned the staging data {self.cleanings} times in the background")
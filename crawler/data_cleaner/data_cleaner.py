@@ -1,36 +1,216 @@
+from typing import Iterator, List, Tuple, Union
+
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import time
+
+import numpy as np
 import pandas as pd
+from pandas.api.types import union_categoricals
+from sqlalchemy import text
 
 from _common.database_communicator.db_connector import DBConnector
-from _common.database_communicator.tables import DataStaging
+from _common.database_communicator.tables import DataStaging, DataStagingCols
 from crawler.data_cleaner.data_transformer import DataTransformer
 from crawler.data_cleaner.metadata_creator import MetadataCreator
 from crawler.data_cleaner.data_saver import DataSaver
+from crawler.data_cleaner.shared_frames import read_shared_frame, write_shared_frame
 
 
 class DataCleaner(DBConnector, DataTransformer, MetadataCreator, DataSaver):
+    TRANSPORT_PICKLE: str = 'pickle'
+    TRANSPORT_ARROW: str = 'arrow'
+
+    # How many staging rows are read, cleaned & saved at once - the memory use does not depend on the staging size
+    CHUNK_SIZE: int = 20000
+    # The key of the advisory lock that lets only one data cleaner at a time take over the staging rows
+    CLEANER_LOCK_ID: int = 7305
+    # With more than 1 worker, every chunk is split into shards transformed in parallel processes (e.g. for backfills)
+    TRANSFORM_WORKERS: int = 1
+    # How the shards go to the transform workers & back - pickled through the pipes of the pool or as the Arrow IPC
+    # streams in shared memory (see 'benchmarks/transform_scaling_benchmark.py')
+    TRANSFORM_TRANSPORT: str = TRANSPORT_ARROW
+
     def __init__(self, flow_name):
         super().__init__()
 
         self.flow_name = flow_name
         self.session = self.create_session()
         self.engine = self.create_sql_engine()
-        self.conn = self.engine.connect()
-
-        self.temp_table_name = None
+        self.transform_pool: Union[ProcessPoolExecutor, None] = None
 
     def __del__(self):
         self.session.close()
-        self.conn.close()
 
     def clean_and_save_data(self) -> None:
         print('Starting data cleaning process...')
-        data = self._get_data()
-        data = self.transform_data(data)
-        data = self.add_metadata(data)
-        self.save_data(data)
-        print('Data cleaning process successfully finished!')
-
-    def _get_data(self) -> pd.DataFrame:
-        query = self.session.query(DataStaging).statement
-        data = pd.read_sql(query, self.engine)
+        hm_chunks = 0
+        transform_seconds = 0.0
+        self.start_transform_workers()
+        try:
+            for chunk in self._iter_data_chunks():
+                ingest_ids = chunk.pop(DataStagingCols.INGEST_ID).tolist()
+
+                start_time = time.perf_counter()
+                data = self.transform_chunk(chunk)
+                transform_seconds += time.perf_counter() - start_time
+
+                self.save_data(data)
+                self._delete_staging_records(ingest_ids)
+                hm_chunks += 1
+        finally:
+            self.stop_transform_workers()
+        print(f'Data cleaning process successfully finished! Cleaned the staging data in {hm_chunks} chunks '
+              f'({transform_seconds:.1f}s spent on transforming with {self.TRANSFORM_WORKERS} workers)')
+
+    def start_transform_workers(self) -> None:
+        # Nothing is started when the 'TRANSFORM_WORKERS' is lower than 2 - then the chunks are transformed serially
+        if self.TRANSFORM_WORKERS < 2:
+            return
+
+        self.transform_pool = ProcessPoolExecutor(
+            max_workers=self.TRANSFORM_WORKERS, mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_transform_worker, initargs=(self.flow_name,)
+        )
+
+    def stop_transform_workers(self) -> None:
+        if self.transform_pool is not None:
+            self.transform_pool.shutdown()
+            self.transform_pool = None
+
+    def transform_chunk(self, chunk: pd.DataFrame) -> pd.DataFrame:
+        """
+        Transform a chunk of the staging data & add the metadata. With the transform workers, the chunk is split into
+        shards that are transformed in parallel & concatenated in their order, so the result is the same as a serial
+        one.
+
+        With the 'arrow' transport, the shards are written as the Arrow IPC streams into shared memory - the strings are
+        copied as the contiguous buffers, instead of pickling every Python object & sending it through the pipes. The
+        other side still builds the Python strings of the object columns, so only the serializing part gets cheaper.
+        """
+        if self.transform_pool is None:
+            return self.add_metadata(self.transform_data(chunk))
+
+        shards = self.split_into_shards(chunk, self.TRANSFORM_WORKERS)
+        if self.TRANSFORM_TRANSPORT == self.TRANSPORT_ARROW:
+            transformed_shards = self.transform_shared_shards(shards)
+        elif self.TRANSFORM_TRANSPORT == self.TRANSPORT_PICKLE:
+            transformed_shards = list(self.transform_pool.map(_transform_shard, shards))
+        else:
+            raise ValueError(f"Unknown transform transport: {self.TRANSFORM_TRANSPORT}")
+        return self.concat_shards(transformed_shards)
+
+    def transform_shared_shards(self, shards: List[pd.DataFrame]) -> List[pd.DataFrame]:
+        futures = [self.transform_pool.submit(_transform_shared_shard, *write_shared_frame(shard)) for shard in shards]
+        return [read_shared_frame(*future.result()) for future in futures]
+
+    @staticmethod
+    def split_into_shards(data: pd.DataFrame, hm_shards: int) -> List[pd.DataFrame]:
+        """
+        Split the data (sorted by the URL) into contiguous shards of similar sizes. A shard never ends in the middle of
+        the records of one URL, so the deduplication of the records works the same as with the whole data.
+        """
+        urls = data[DataStagingCols.URL].to_numpy()
+        bounds = [0]
+        for bound in np.linspace(0, len(urls), hm_shards + 1)[1:-1].astype(int):
+            bound = max(bound, bounds[-1])
+            while 0 < bound < len(urls) and urls[bound] == urls[bound - 1]:
+                bound += 1
+            if bounds[-1] < bound < len(urls):
+                bounds.append(bound)
+        bounds.append(len(urls))
+
+        return [data.iloc[start:end] for start, end in zip(bounds, bounds[1:])]
+
+    def concat_shards(self, shards: List[pd.DataFrame]) -> pd.DataFrame:
+        data = pd.concat(shards)
+        for column in self.CATEGORY_COLUMNS:
+            # Every shard has its own categories - the sorted union gives the same categories as the serial transform
+            data[column] = union_categoricals([shard[column] for shard in shards], sort_categories=True)
         return data
+
+    def _iter_data_chunks(self) -> Iterator[pd.DataFrame]:
+        """
+        Read the staging table in chunks of CHUNK_SIZE rows, through a server-side cursor. The rows are sorted by the
+        URL (& by the ingest id - the order they were saved in), so all the records of an offer end up in one chunk -
+        the rows of the last URL of a chunk are held back for the next one. Thanks to that, the deduplication of the
+        records works the same as with the whole table read at once.
+
+        Only the rows up to the highest ingest id at the start (the watermark) are taken over, so the crawlers can keep
+        on saving the records in the meantime - their rows are left for the next cleaning. The chunks have the ingest
+        ids of their rows, so exactly the cleaned rows are deleted.
+        """
+        columns = DataStaging.__table__.columns.keys()
+        column_list = ', '.join(f'"{column}"' for column in columns)
+
+        connection = self.engine.raw_connection()
+        try:
+            cursor = connection.cursor()
+            # The lock is released with the end of the transaction, so also when the cleaning fails
+            cursor.execute(f'SELECT pg_try_advisory_xact_lock({self.CLEANER_LOCK_ID})')
+            if not cursor.fetchone()[0]:
+                print('Another data cleaner is processing the staging data, skipping...')
+                return
+
+            cursor.execute(f'SELECT max("{DataStagingCols.INGEST_ID}") FROM {DataStaging.__tablename__}')
+            watermark = cursor.fetchone()[0]
+            if watermark is None:
+                return
+
+            print(f'Cleaning the staging rows up to the ingest id {watermark}...')
+            cursor.execute(f'DECLARE staging_chunks NO SCROLL CURSOR FOR '
+                           f'SELECT {column_list} FROM {DataStaging.__tablename__} '
+                           f'WHERE "{DataStagingCols.INGEST_ID}" <= {int(watermark)} '
+                           f'ORDER BY "{DataStagingCols.URL}", "{DataStagingCols.INGEST_ID}"')
+
+            held_back_rows = []
+            while True:
+                cursor.execute(f'FETCH FORWARD {self.CHUNK_SIZE} FROM staging_chunks')
+                rows = held_back_rows + list(cursor.fetchall())
+                if len(rows) == len(held_back_rows):
+                    break
+
+                last_url = rows[-1][0]
+                split_at = len(rows)
+                while split_at > 0 and rows[split_at - 1][0] == last_url:
+                    split_at -= 1
+
+                held_back_rows = rows[split_at:]
+                if split_at > 0:
+                    yield pd.DataFrame.from_records(rows[:split_at], columns=columns)
+
+            if held_back_rows:
+                yield pd.DataFrame.from_records(held_back_rows, columns=columns)
+
+            cursor.close()
+            connection.commit()
+        finally:
+            connection.close()
+
+    def _delete_staging_records(self, ingest_ids: List[int]) -> None:
+        query = text(f'DELETE FROM {DataStaging.__tablename__} WHERE "{DataStagingCols.INGEST_ID}" = ANY(:ingest_ids)')
+        self.session.execute(query, {'ingest_ids': ingest_ids})
+        self.session.commit()
+
+
+class ChunkTransformer(DataTransformer, MetadataCreator):
+    """The transforming part of the data cleaner, without the database connection - used by the transform workers."""
+
+    def __init__(self, flow_name):
+        self.flow_name = flow_name
+
+
+_worker_transformer: Union[ChunkTransformer, None] = None
+
+
+def _init_transform_worker(flow_name: str) -> None:
+    global _worker_transformer
+    _worker_transformer = ChunkTransformer(flow_name)
+
+
+def _transform_shard(shard: pd.DataFrame) -> pd.DataFrame:
+    return _worker_transformer.add_metadata(_worker_transformer.transform_data(shard))
+
+
+def _transform_shared_shard(name: str, size: int) -> Tuple[str, int]:
+    return write_shared_frame(_transform_shard(read_shared_frame(name, size)))
@@ -1,75 +1,96 @@
-from datetime import datetime
-import random
-import string
+from typing import List, Tuple
+
 import pandas as pd
-from sqlalchemy import update
-from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import Session
-from sqlalchemy.sql import text
 
-from _common.database_communicator.tables import DataMain, DataMainCols, DataStaging
-from crawler.common.create_run_id import create_run_id
+from _common.database_communicator.pg_copy import copy_rows
+from _common.database_communicator.tables import DataMain, DataMainCols, DataPriceHistory, DataPriceHistoryCols
 
 
 class DataSaver:
     engine: Engine
-    conn: Connection
     session: Session
     flow_name: str
+    UPSERT_TABLE_NAME: str = 'data_main_upsert'
+    # Updated for every record that is already in the main table
+    UPDATED_ON_SEEN_COLUMNS: List[str] = [DataMainCols.LAST_TIME_SEEN, DataMainCols.RUN_ID]
+    # Not updated, even when the record has changed
+    KEPT_ON_CHANGE_COLUMNS: List[str] = [DataMainCols.URL, DataMainCols.INSERT_DATE, DataMainCols.LAST_TIME_SEEN,
+                                         DataMainCols.RUN_ID]
 
     def save_data(self, data: pd.DataFrame) -> None:
         print(f"Scraped {data.shape[0]} new records from the websites...")
 
-        self._clone_table(DataMain.__tablename__)
-        data.to_sql(self.temp_table_name, con=self.conn, if_exists='append', index=False)
-
-        already_in_db, not_in_db = self._split_duplicates_and_new_records(data)
-        print(f"There are {not_in_db.shape[0]} new records that will be inserted into the database...")
-        print(f"Found {already_in_db.shape[0]} records that are already in the database. Updating the 'last_time_seen' "
-              f"& 'run_id' columns...")
-
-        not_in_db.to_sql(DataMain.__tablename__, con=self.engine, if_exists='append', index=False)
-        if not already_in_db.empty:
-            self._update_columns(already_in_db)
-
-        self._delete_clone_table()
-        self.session.query(DataStaging).delete()
-        self.session.commit()
+        hm_inserted, hm_updated, hm_changed = self._upsert_records(data)
+        print(f"Inserted {hm_inserted} new records into the database & updated the 'last_time_seen' & 'run_id' columns "
+              f"of {hm_updated} records that were already in the database ({hm_changed} of them changed & their "
+              f"previous versions were saved into the '{DataPriceHistory.__tablename__}')...")
         print("The database has been successfully updated!")
 
-    def _clone_table(self, table_name: str) -> None:
-        char_set = string.ascii_lowercase + string.digits
-        temp_table_name = 'zzz' + ''.join([random.choice(char_set) for _ in range(10)])
-
-        query = text(f'CREATE TABLE {temp_table_name} AS SELECT * FROM {table_name} LIMIT 0')
-        self.conn.execute(query)
-        self.conn.commit()  # noqa
-
-        self.temp_table_name = temp_table_name
-
-    def _delete_clone_table(self) -> None:
-        self.conn.execute(text(f'DROP TABLE {self.temp_table_name}'))
-        self.conn.commit()  # noqa
-
-    def _split_duplicates_and_new_records(self, data: pd.DataFrame):
-        select_duplicates_query = (f'SELECT temp."{DataMainCols.URL}" FROM {self.temp_table_name} temp '
-                                   f'INNER JOIN {DataMain.__tablename__} main '
-                                   f'ON temp."{DataMainCols.URL}" = main."{DataMainCols.URL}"')
-
-        duplicates = pd.read_sql(select_duplicates_query, con=self.engine)
-        mask_in_db = data[DataMainCols.URL].isin(duplicates[DataMainCols.URL].to_numpy())
-
-        already_in_db = data.loc[mask_in_db, :]
-        not_in_db = data.loc[~mask_in_db, :]
-
-        return already_in_db, not_in_db
-
-    def _update_columns(self, data: pd.DataFrame) -> None:
-        urls_to_update = data[DataMainCols.URL]
-
-        update_query = update(DataMain).where(DataMain.url.in_(urls_to_update)).values({
-            DataMainCols.LAST_TIME_SEEN: datetime.today(),
-            DataMainCols.RUN_ID: create_run_id(self.flow_name)
-        })
-        self.session.execute(update_query)
-        self.session.commit()
+    def _upsert_records(self, data: pd.DataFrame) -> Tuple[int, int, int]:
+        """
+        Merge the records into the main table on the database side, in one transaction: the records are loaded with
+        'COPY' into a temporary table & inserted into the main table with 'ON CONFLICT (url) DO UPDATE'. The records
+        that are already in the main table get the new 'last_time_seen' & 'run_id'. Only when the 'row_hash' of such a
+        record differs from the stored one (compared in the lookup by the primary key), the stored version is appended
+        to the price history & the record is updated with the new values.
+
+        The records without a 'row_hash' (the URLs only seen on the listing pages) are never treated as changed.
+
+        :return: the number of the inserted, the updated & the changed (out of the updated) records.
+        """
+        main_columns = DataMain.__table__.columns.keys()
+        columns = [column for column in data.columns if column in main_columns]
+        column_list = ', '.join(f'"{column}"' for column in columns)
+
+        main_table = DataMain.__tablename__
+        changed = (f'EXCLUDED."{DataMainCols.ROW_HASH}" IS NOT NULL AND '
+                   f'{main_table}."{DataMainCols.ROW_HASH}" IS DISTINCT FROM EXCLUDED."{DataMainCols.ROW_HASH}"')
+        changed_columns = [column for column in columns if column not in self.KEPT_ON_CHANGE_COLUMNS]
+        set_list = ', '.join([f'"{column}" = EXCLUDED."{column}"' for column in self.UPDATED_ON_SEEN_COLUMNS] + [
+            f'"{column}" = CASE WHEN {changed} THEN EXCLUDED."{column}" ELSE {main_table}."{column}" END'
+            for column in changed_columns
+        ])
+
+        # The stored version of a record, with the run that found the change
+        history_columns = [column for column in DataPriceHistory.__table__.columns.keys()
+                           if column in main_columns and column != DataPriceHistoryCols.RUN_ID]
+        history_column_list = ', '.join(f'"{column}"' for column in history_columns)
+        history_values = ', '.join(f'main."{column}"' for column in history_columns)
+
+        # Both statements see the main table from before the merge, so the history gets the previous versions. 'xmax' of
+        # a freshly inserted row is 0, the updated rows have it set
+        merge_query = (f'WITH history AS ('
+                       f'INSERT INTO {DataPriceHistory.__tablename__} ({history_column_list}, '
+                       f'"{DataPriceHistoryCols.CHANGED_DATE}", "{DataPriceHistoryCols.RUN_ID}") '
+                       f'SELECT {history_values}, '
+                       f'upsert."{DataMainCols.LAST_TIME_SEEN}", upsert."{DataMainCols.RUN_ID}" '
+                       f'FROM {self.UPSERT_TABLE_NAME} upsert '
+                       f'JOIN {main_table} main ON main."{DataMainCols.URL}" = upsert."{DataMainCols.URL}" '
+                       f'WHERE upsert."{DataMainCols.ROW_HASH}" IS NOT NULL AND '
+                       f'main."{DataMainCols.ROW_HASH}" IS DISTINCT FROM upsert."{DataMainCols.ROW_HASH}" '
+                       f'RETURNING 1), '
+                       f'merged AS ('
+                       f'INSERT INTO {main_table} ({column_list}) '
+                       f'SELECT {column_list} FROM {self.UPSERT_TABLE_NAME} '
+                       f'ON CONFLICT ("{DataMainCols.URL}") DO UPDATE SET {set_list} '
+                       f'RETURNING (xmax = 0) AS inserted) '
+                       f'SELECT count(*) FILTER (WHERE inserted), count(*) FILTER (WHERE NOT inserted), '
+                       f'(SELECT count(*) FROM history) FROM merged')
+
+        connection = self.engine.raw_connection()
+        try:
+            cursor = connection.cursor()
+            cursor.execute(f'CREATE TEMPORARY TABLE {self.UPSERT_TABLE_NAME} '
+                           f'(LIKE {main_table}) ON COMMIT DROP')
+            copy_rows(connection, self.UPSERT_TABLE_NAME, columns, data[columns].itertuples(index=False, name=None))
+
+            cursor.execute(merge_query)
+            hm_inserted, hm_updated, hm_changed = cursor.fetchone()
+            cursor.close()
+            connection.commit()
+        finally:
+            connection.close()
+
+        return hm_inserted, hm_updated, hm_changed
@@ -1,22 +1,93 @@
-from typing import Union, List, Any, Callable
+from typing import List, Any, Callable, TypeVar
 
 import re
+import numpy as np
 import pandas as pd
 
 from _common.misc.variables import LOCATION_MAP
 
 from _common.database_communicator.tables import DataMainCols, DataStagingCols
+from crawler.data_cleaner.location_matcher import LocationMatcher
+
+
+NUMBER_PATTERN = re.compile('([0-9]*[,]?[0-9]+)')
+CURRENCY_PATTERN = re.compile('([0-9]*[,]?[0-9]+)(.*)')
+FLOOR_PATTERN = re.compile('(-?[0-9]{1,3})[/]([0-9]{1,2})')
+FLOOR_NAMES = {'parter': '0', 'poddasze': '100', 'suterena': '-1'}
+FLOOR_NAMES_PATTERN = re.compile('|'.join(FLOOR_NAMES.keys()))
+PROPERTY_TYPE_KEYWORDS = {
+    'dom': ['wolnostojący', 'dom', 'bliźniak', 'szeregowiec'],
+    'kamienica': ['kamienica'],
+    'blok': ['blok'],
+    'apartamentowiec': ['apartamentowiec'],
+    'inne': ['plomba', 'pozostałe']
+}
+# The alternatives are tried in the order of the categories at the start of the value, so the first category with any
+# keyword found in the value wins - like checking the keywords one category after another
+PROPERTY_TYPE_PATTERN = re.compile('^(?:' + '|'.join(
+    f"(?P<{category}>(?=.*?(?:{'|'.join(re.escape(keyword.lower()) for keyword in keywords)})))"
+    for category, keywords in PROPERTY_TYPE_KEYWORDS.items()
+) + ')', re.DOTALL)
+LOCATION_MATCHER = LocationMatcher(LOCATION_MAP)
+
+FrameOrSeries = TypeVar('FrameOrSeries', pd.DataFrame, pd.Series)
+
+
+def normalize_value(value: Any) -> Any:
+    if isinstance(value, str) and 'http' not in value and 'www' not in value:
+        return value.lower().strip()
+    return value
+
+
+def map_unique(values: pd.Series, func: Callable[[pd.Series], FrameOrSeries]) -> FrameOrSeries:
+    """
+    Run a column-wise function only over the distinct values of the column (factorized once) & map the results back to
+    the rows through the codes. The staging columns repeat a few hundred values at most, so the cost depends on them
+    instead of on the number of the rows.
+
+    The missing values are passed to the function as one more distinct value - the first of them, so a None stays None.
+    A function may return a frame (a few columns extracted at once) - its rows are mapped back like the values.
+    """
+    codes, uniques = pd.factorize(values)
+    unique_values = list(uniques)
+
+    missing = codes == -1
+    if missing.any():
+        codes = np.where(missing, len(unique_values), codes)
+        unique_values.append(values[missing].iloc[0])
+
+    results = func(pd.Series(unique_values, dtype=values.dtype))
+    if isinstance(results, pd.DataFrame):
+        return results.take(codes).set_axis(values.index)
+    return pd.Series(results.to_numpy().take(codes), index=values.index, dtype=results.dtype)
+
+
+def as_applied(values: pd.Series, dtype: Any) -> pd.Series:
+    """
+    Give the vectorized result the dtype that 'Series.apply' would infer for the same values - the missing values are
+    None in the columns of the objects & the numbers are floats when any of them is missing.
+    """
+    if values.isna().all():
+        return pd.Series([None] * len(values), index=values.index, dtype=object)
+    if dtype is object:
+        return values.where(values.notna(), None)
+    if values.hasnans:
+        return values.astype(float)
+    return values.astype(dtype)
 
 
 class DataTransformer:
     data: pd.DataFrame
+    # The columns with a closed set of values - they are kept as categoricals, which takes much less memory downstream
+    CATEGORY_COLUMNS: List[str] = [DataStagingCols.PROPERTY_TYPE, DataStagingCols.STATUS,
+                                   DataStagingCols.PROPERTY_CONDITION, DataStagingCols.LOCATION]
 
     def transform_data(self, data: pd.DataFrame) -> pd.DataFrame:
         data = self._preprocess_data(data)
 
-        data = self.process_column(data, DataStagingCols.PRICE, extractor_func=self.extract_currency,
-                                   insert_column=DataMainCols.CURRENCY)
-        data = self.process_column(data, DataStagingCols.PRICE, extractor_func=self.extract_float)
+        price_and_currency = map_unique(data[DataStagingCols.PRICE], self.extract_price_and_currency)
+        data[DataMainCols.CURRENCY] = price_and_currency[DataMainCols.CURRENCY]
+        data[DataStagingCols.PRICE] = price_and_currency[DataStagingCols.PRICE]
         data = self.process_column(data, DataStagingCols.SIZE, extractor_func=self.extract_float)
         data = self.process_column(data, DataStagingCols.LOCATION, extractor_func=self.extract_location)
         data = self.process_column(data, DataStagingCols.FLOOR, extractor_func=self.extract_floor)
@@ -35,16 +106,17 @@ class DataTransformer:
         self.cast_type(data, DataStagingCols.LOCATION, str)
         self.cast_type(data, DataStagingCols.DESC, str)
 
+        for column in self.CATEGORY_COLUMNS:
+            data[column] = data[column].astype('category')
+
         return data
 
     def _preprocess_data(self, data: pd.DataFrame) -> pd.DataFrame:
         data = data.drop_duplicates(DataStagingCols.URL, keep='last')
-        data = data.applymap(lambda value: value.lower().strip()
-                             if isinstance(value, str) and 'http' not in value and 'www' not in value
-                             else value)
+        data = data.apply(self.normalize_text)
 
         # These are the offers that do not exist anymore, but for some reason they are still present in the OLX browser
-        price_mask = data[DataStagingCols.PRICE].apply(lambda x: False if 'nie istnieje' in str(x) else True)
+        price_mask = ~data[DataStagingCols.PRICE].astype(str).str.contains('nie istnieje', regex=False)
         data = data.loc[price_mask, :]
 
         # When a given information is missing, but it is not stored as NA, then convert the information to NA
@@ -57,6 +129,18 @@ class DataTransformer:
 
         return data
 
+    @staticmethod
+    def normalize_text(values: pd.Series) -> pd.Series:
+        """
+        Lowercase & strip the texts, except for the links. The values other than strings are left as they are.
+
+        It is one pass over the distinct values on purpose - with the columns of Python objects every '.str' method is a
+        separate loop over the values, so lowering, stripping & looking for the links with them costs 3-4 times more.
+        """
+        if values.dtype != object:
+            return values
+        return map_unique(values, lambda unique_values: unique_values.map(normalize_value))
+
     @staticmethod
     def replace_with_na(data: pd.DataFrame, columns: List[str], value_to_replace: Any) -> pd.DataFrame:
         for column in columns:
@@ -65,8 +149,11 @@ class DataTransformer:
 
     @staticmethod
     def process_column(data: pd.DataFrame, column: str, extractor_func: Callable, insert_column: str = None):
-        values = data[column]
-        values = values.apply(extractor_func)
+        """
+        :param extractor_func: a function that takes the whole column (a Series) & returns the processed one. It gets
+        only the distinct values of the column - the results are mapped back to the rows.
+        """
+        values = map_unique(data[column], extractor_func)
 
         if insert_column is not None:
             column = insert_column
@@ -75,91 +162,42 @@ class DataTransformer:
         return data
 
     @staticmethod
-    def extract_float(value: Union[str, None]) -> Union[float, None]:
-        if pd.isna(value):
-            return None
-
-        value = value.replace(' ', '')
-        pattern = '([0-9]*[,]?[0-9]+)'
-        value = re.search(pattern, value)
-        if value is None:
-            return None
-
-        value = value.group(1).replace(',', '.')
-        value = float(value)
-        return value
+    def extract_float(values: pd.Series) -> pd.Series:
+        values = values.str.replace(' ', '', regex=False).str.extract(NUMBER_PATTERN, expand=False)
+        values = values.str.replace(',', '.', regex=False).astype(float)
+        return as_applied(values, float)
 
     @staticmethod
-    def extract_currency(value: Union[str, None]) -> Union[str, None]:
-        if pd.isna(value):
-            return None
-
-        value = value.replace(' ', '')
-        pattern = '([0-9]*[,]?[0-9]+)(.*)'
-        value = re.search(pattern, value)
-        if value is None:
-            return None
-
-        value = value.group(2).upper()
-        return value
+    def extract_price_and_currency(values: pd.Series) -> pd.DataFrame:
+        """The number & the currency are matched with one regex - the number is the same as found by 'extract_float'."""
+        extracted = values.str.replace(' ', '', regex=False).str.extract(CURRENCY_PATTERN, expand=True)
+        price = extracted[0].str.replace(',', '.', regex=False).astype(float)
+        currency = extracted[1].str.upper()
+        return pd.DataFrame({DataStagingCols.PRICE: as_applied(price, float),
+                             DataMainCols.CURRENCY: as_applied(currency, object)})
 
     @staticmethod
-    def extract_location(value: Union[str, None]) -> Union[str, None]:
-        if value is None:
-            return None
-
-        for location, sublocations in LOCATION_MAP.items():
-            for sublocation in sublocations:
-                if sublocation.lower() in value:
-                    matched_loc = location
-                    return matched_loc
-
-        return None
+    def extract_location(values: pd.Series) -> pd.Series:
+        return values.apply(LOCATION_MATCHER.match)
 
     @staticmethod
-    def extract_floor(value: Union[str, None]) -> Union[int, None]:
-        if pd.isna(value):
-            return None
-
-        value = value.replace(' ', '')
-
-        value = value.\
-            replace('parter', '0').\
-            replace('poddasze', '100').\
-            replace('suterena', '-1')
-
-        pattern = '(-?[0-9]{1,3})[/]([0-9]{1,2})'
-        value = re.search(pattern, value)
-        if value is None:
-            return None
+    def extract_floor(values: pd.Series) -> pd.Series:
+        # The floor names do not overlap, so they can be replaced in one pass instead of one by one
+        values = values.str.replace(' ', '', regex=False).\
+            str.replace(FLOOR_NAMES_PATTERN, lambda match: FLOOR_NAMES[match.group(0)], regex=True)
 
-        value = value.group(1)
-        value = int(value)
-        return value
+        values = values.str.extract(FLOOR_PATTERN, expand=True)[0].astype(float)
+        return as_applied(values, int)
 
     @staticmethod
-    def extract_property_type(value: Union[str, None]) -> Union[str, None]:
-        if pd.isna(value):
-            return None
-
-        def search_keywords(actual_value, keywords):
-            for keyword in keywords:
-                if keyword.lower() in actual_value.lower():
-                    return True
-
-        categories_dict = {
-            'dom': ['wolnostojący', 'dom', 'bliźniak', 'szeregowiec'],
-            'kamienica': ['kamienica'],
-            'blok': ['blok'],
-            'apartamentowiec': ['apartamentowiec'],
-            'inne': ['plomba', 'pozostałe']
-        }
-
-        value = value.replace(' ', '')
-        for category, keywords_ in categories_dict.items():
-            if search_keywords(value, keywords_):
-                return category
-        return None
+    def extract_property_type(values: pd.Series) -> pd.Series:
+        values = values.str.replace(' ', '', regex=False).str.lower()
+
+        # Every category is a separate group of the pattern - the one that matched is the only non-missing column
+        matched_groups = values.str.extract(PROPERTY_TYPE_PATTERN, expand=True).notna().to_numpy()
+        categories = np.array(list(PROPERTY_TYPE_KEYWORDS.keys()), dtype=object)[matched_groups.argmax(axis=1)]
+        categories = pd.Series(np.where(matched_groups.any(axis=1), categories, None), index=values.index)
+        return as_applied(categories, object)
 
     @staticmethod
     def cast_type(data: pd.DataFrame, column: str, col_type: Any):
@@ -0,0 +1,68 @@
+from typing import Dict, List, Tuple, Union
+
+import re
+
+
+class LocationMatcher:
+    """
+    Matches the location of an offer against a map of the locations & their sublocations with one precompiled regex.
+
+    The priority of a sublocation is its position in the map (the most detailed locations go first). The regex is built
+    from a trie of all the sublocations & wrapped in a lookahead, so in a single pass over the text it finds the longest
+    sublocation starting at every position (the shorter ones starting there are its prefixes & are resolved from the
+    precomputed priorities). The best priority of all the found sublocations decides the location.
+
+    It gives the same result as checking the sublocations one by one, but the cost grows with the length of the text
+    instead of the number of the sublocations - the map can have hundreds of them.
+    """
+
+    def __init__(self, location_map: Dict[str, List[str]]):
+        """
+        :param location_map: the location -> its sublocations, ordered from the most detailed locations.
+        """
+        sublocations: Dict[str, Tuple[int, str]] = {}
+        for location, location_sublocations in location_map.items():
+            for sublocation in location_sublocations:
+                sublocations.setdefault(sublocation.lower(), (len(sublocations), location))
+
+        # The best priority among a sublocation & all the sublocations that are its prefixes
+        self.best_matches: Dict[str, Tuple[int, str]] = {
+            sublocation: min(sublocations[sublocation[:length]] for length in range(len(sublocation) + 1)
+                             if sublocation[:length] in sublocations)
+            for sublocation in sublocations.keys()
+        }
+
+        trie = {}
+        for sublocation in sublocations.keys():
+            node = trie
+            for char in sublocation:
+                node = node.setdefault(char, {})
+            node[''] = {}
+
+        self.pattern = re.compile(f'(?=({self._trie_to_regex(trie)}))') if sublocations else None
+
+    def _trie_to_regex(self, trie: dict) -> str:
+        alternatives = [re.escape(char) + self._trie_to_regex(node) for char, node in trie.items() if char]
+        if not alternatives:
+            return ''
+
+        regex = alternatives[0] if len(alternatives) == 1 else f"(?:{'|'.join(alternatives)})"
+        if '' in trie:
+            # The greedy optional group prefers the longer sublocations
+            regex = f'(?:{regex})?'
+        return regex
+
+    def match(self, value: Union[str, None]) -> Union[str, None]:
+        """
+        :param value: the lowercase location of an offer.
+        :return: the location of the sublocation with the best priority found in the value, or None.
+        """
+        if value is None or self.pattern is None:
+            return None
+
+        found = self.pattern.findall(value)
+        if not found:
+            return None
+
+        _, location = min(self.best_matches[sublocation] for sublocation in found)
+        return location
@@ -2,6 +2,7 @@ from typing import List
 
 import hashlib
 from datetime import datetime
+import numpy as np
 import pandas as pd
 
 from _common.database_communicator.tables import DataMainCols
@@ -9,17 +10,30 @@ from crawler.common.create_run_id import create_run_id
 
 
 class MetadataCreator:
+    ROW_HASH_COMPAT: str = 'compat'
+    ROW_HASH_NORMALIZED: str = 'normalized'
+    ROW_HASH_FAST: str = 'fast'
+
     data: pd.DataFrame
     flow_name: str
+    # The hashes of the 'normalized' mode differ from the ones made by the versions before the price history - the
+    # 'RowHashMigration' has to recompute the stored ones before the first cleaning. The 'fast' mode differs from both,
+    # switch to it only with a fresh table
+    ROW_HASH_MODE: str = ROW_HASH_NORMALIZED
     COLUMNS_FOR_HASH: List[str] = [DataMainCols.PRICE, DataMainCols.CURRENCY, DataMainCols.ROOMS, DataMainCols.FLOOR,
                                    DataMainCols.LOCATION]
+    # Hashed as floats in the 'normalized' & the 'fast' mode, whatever their dtype in the batch is
+    FLOAT_COLUMNS_FOR_HASH: List[str] = [DataMainCols.PRICE, DataMainCols.FLOOR]
 
     def add_metadata(self, data):
         today_date = datetime.now().strftime("%Y-%m-%d")
 
         data[DataMainCols.INSERT_DATE] = today_date
         data[DataMainCols.LAST_TIME_SEEN] = today_date
-        data[DataMainCols.ROW_HASH] = data.apply(self._create_row_hash, axis=1)
+        data[DataMainCols.ROW_HASH] = self.create_row_hashes(data)
+        # The records without any of the hashed values (the URLs only seen on the listing pages) get no hash - there is
+        # nothing to compare with the stored records
+        data.loc[data[self.COLUMNS_FOR_HASH].isna().all(axis=1), DataMainCols.ROW_HASH] = None
         data[DataMainCols.RUN_ID] = create_run_id(self.flow_name)
 
         data[DataMainCols.INSERT_DATE] = pd.to_datetime(data[DataMainCols.INSERT_DATE])
@@ -27,7 +41,35 @@ class MetadataCreator:
 
         return data
 
-    def _create_row_hash(self, row):
-        values_to_hash = tuple(row[self.COLUMNS_FOR_HASH])
-        hash_ = hashlib.sha256(str(values_to_hash).encode('utf-8')).hexdigest()
-        return hash_
+    def create_row_hashes(self, data: pd.DataFrame) -> pd.Series:
+        """
+        Hash the COLUMNS_FOR_HASH of every row.
+
+        The 'compat' mode gives the same hashes as the ones stored in 'data_main' (sha256 of the row tuple's string,
+        with the values in the dtypes of the batch) - the rows are only read as plain tuples, instead of building a
+        Series for every row with 'apply'. The dtypes depend on the batch though (e.g. the floors are ints only when
+        none of them is missing), so the same record may get another hash in another batch - a spurious change in the
+        price history. The 'normalized' mode hashes the same way, but the FLOAT_COLUMNS_FOR_HASH are always floats (NaN
+        when missing). The 'fast' mode hashes the normalized columns in bulk with 'pd.util.hash_pandas_object' (the
+        values are serialized column by column) & gives 64-bit hex hashes.
+        """
+        if self.ROW_HASH_MODE not in (self.ROW_HASH_COMPAT, self.ROW_HASH_NORMALIZED, self.ROW_HASH_FAST):
+            raise ValueError(f"Unknown row hash mode: {self.ROW_HASH_MODE}")
+
+        values = data[self.COLUMNS_FOR_HASH].copy()
+        for column in self.COLUMNS_FOR_HASH:
+            # The categorical columns are hashed like the plain ones - with None (not NaN) for the missing values
+            if isinstance(values[column].dtype, pd.CategoricalDtype):
+                values[column] = values[column].astype(object).where(values[column].notna(), None)
+
+        if self.ROW_HASH_MODE != self.ROW_HASH_COMPAT:
+            values = values.astype({column: float for column in self.FLOAT_COLUMNS_FOR_HASH})
+
+        if self.ROW_HASH_MODE == self.ROW_HASH_FAST:
+            hashes = pd.util.hash_pandas_object(values, index=False).to_numpy().astype('>u8')
+            hex_hashes = np.frombuffer(hashes.tobytes().hex().encode('ascii'), dtype='S16').astype(str)
+            return pd.Series(hex_hashes, index=data.index, dtype=object)
+
+        hashes = [hashlib.sha256(str(row).encode('utf-8')).hexdigest()
+                  for row in values.itertuples(index=False, name=None)]
+        return pd.Series(hashes, index=data.index, dtype=object)
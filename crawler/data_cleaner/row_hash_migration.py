@@ -0,0 +1,79 @@
+from typing import List
+
+import pandas as pd
+
+from _common.database_communicator.db_connector import DBConnector
+from _common.database_communicator.pg_copy import copy_rows
+from _common.database_communicator.tables import DataMain, DataMainCols
+from crawler.data_cleaner.metadata_creator import MetadataCreator
+
+
+class RowHashMigration(DBConnector, MetadataCreator):
+    """
+    A one-off migration: recomputes the 'row_hash' of all the records of the main table in the 'normalized' mode of the
+    MetadataCreator. Run it once, before the first cleaning with the price history (i.e. before deploying it):
+
+        python -m crawler.data_cleaner.row_hash_migration
+
+    The stored hashes were made in the 'compat' mode, with the dtypes of the batch a record was cleaned in - the floors
+    were hashed as ints when no floor of the batch was missing & the missing values as None when a column was missing
+    in the whole batch. Compared with the 'normalized' hashes, every such record would be saved as a change into the
+    price history. The hashed values themselves are not touched.
+    """
+    ROW_HASH_MODE: str = MetadataCreator.ROW_HASH_NORMALIZED
+    CHUNK_SIZE: int = 20000
+    REHASH_TABLE_NAME: str = 'data_main_rehash'
+
+    def migrate(self) -> int:
+        """:return: the number of the records whose 'row_hash' has changed."""
+        columns = [DataMainCols.URL] + self.COLUMNS_FOR_HASH
+        column_list = ', '.join(f'"{column}"' for column in columns)
+        main_table = DataMain.__tablename__
+
+        connection = self.create_sql_engine().raw_connection()
+        try:
+            cursor = connection.cursor()
+            cursor.execute(f'CREATE TEMPORARY TABLE {self.REHASH_TABLE_NAME} '
+                           f'("{DataMainCols.URL}" TEXT, "{DataMainCols.ROW_HASH}" VARCHAR(64)) ON COMMIT DROP')
+            cursor.execute(f'DECLARE main_records NO SCROLL CURSOR FOR SELECT {column_list} FROM {main_table}')
+
+            hm_records = 0
+            while True:
+                cursor.execute(f'FETCH FORWARD {self.CHUNK_SIZE} FROM main_records')
+                rows = cursor.fetchall()
+                if not rows:
+                    break
+
+                row_hashes = self.rehash_records(rows, columns)
+                copy_rows(connection, self.REHASH_TABLE_NAME, [DataMainCols.URL, DataMainCols.ROW_HASH],
+                          row_hashes.itertuples(index=False, name=None))
+                hm_records += len(rows)
+
+            cursor.execute('CLOSE main_records')
+            cursor.execute(f'UPDATE {main_table} main SET "{DataMainCols.ROW_HASH}" = rehash."{DataMainCols.ROW_HASH}" '
+                           f'FROM {self.REHASH_TABLE_NAME} rehash '
+                           f'WHERE main."{DataMainCols.URL}" = rehash."{DataMainCols.URL}" AND '
+                           f'main."{DataMainCols.ROW_HASH}" IS DISTINCT FROM rehash."{DataMainCols.ROW_HASH}"')
+            hm_changed = cursor.rowcount
+            cursor.close()
+            connection.commit()
+        finally:
+            connection.close()
+
+        print(f"Recomputed the row hashes of {hm_records} records of the '{main_table}' - {hm_changed} of them changed")
+        return hm_changed
+
+    def rehash_records(self, rows: List[tuple], columns: List[str]) -> pd.DataFrame:
+        """
+        :return: the URL & the new 'row_hash' of every record. The values are kept as the Python objects read from the
+        database (e.g. the rooms as ints, not as floats), like in the cleaned data.
+        """
+        records = pd.DataFrame(rows, columns=columns, dtype=object)
+        row_hashes = self.create_row_hashes(records)
+        # Like in 'add_metadata' - the records without any of the hashed values get no hash
+        row_hashes[records[self.COLUMNS_FOR_HASH].isna().all(axis=1)] = None
+        return pd.DataFrame({DataMainCols.URL: records[DataMainCols.URL], DataMainCols.ROW_HASH: row_hashes})
+
+
+if __name__ == '__main__':
+    RowHashMigration().migrate()
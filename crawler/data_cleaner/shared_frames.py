@@ -0,0 +1,40 @@
+from typing import Tuple
+
+from multiprocessing import shared_memory
+
+import pandas as pd
+import pyarrow as pa
+
+
+def write_shared_frame(data: pd.DataFrame) -> Tuple[str, int]:
+    """
+    Write the frame as an Arrow IPC stream into a new block of shared memory. The string columns are written as the
+    contiguous Arrow buffers, not as the pickled Python objects. The block has to be read with 'read_shared_frame',
+    which also frees it.
+
+    :return: the name of the shared memory block & the size of the stream.
+    """
+    table = pa.Table.from_pandas(data, preserve_index=True)
+    stream = pa.BufferOutputStream()
+    with pa.ipc.new_stream(stream, table.schema) as writer:
+        writer.write_table(table)
+    buffer = stream.getvalue()
+
+    block = shared_memory.SharedMemory(create=True, size=buffer.size)
+    block.buf[:buffer.size] = memoryview(buffer).cast('B')
+    block.close()
+    return block.name, buffer.size
+
+
+def read_shared_frame(name: str, size: int) -> pd.DataFrame:
+    """Read the frame written by 'write_shared_frame' (in any process) & free its shared memory block."""
+    block = shared_memory.SharedMemory(name=name)
+    try:
+        # The stream is copied out at once (a plain memory copy) - the frame may keep referencing the Arrow buffers,
+        # so it must not point into the block that is freed below
+        buffer = pa.py_buffer(bytes(block.buf[:size]))
+    finally:
+        block.close()
+        block.unlink()
+
+    return pa.ipc.open_stream(buffer).read_all().to_pandas()
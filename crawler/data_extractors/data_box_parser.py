@@ -0,0 +1,108 @@
+from typing import Dict, List, Tuple, Union
+
+from collections import Counter
+import re
+
+# All the parsers created in the process - their unknown labels are reported together
+_parsers: List['DataBoxParser'] = []
+
+
+class DataBoxParser:
+    """
+    Reads the data box of an offer (a table of the labels & the values) in a single pass. The text of the box is split
+    into the label -> value dictionary once & only the values of the known labels are matched with their (precompiled)
+    regexes - instead of searching the whole text with a separate regex for every column.
+
+    Two layouts of the box are supported:
+        - LINE_PAIRS: the label & the value are in the consecutive lines ('piętro\\n2/4'); a line is a value only when
+          it does not hold a known label,
+        - LABEL_COLON_VALUE: the label & the value are in the same line ('poziom: 2').
+
+    The labels that are not known to the parser are counted (once per box), so a change of the portal's data box can be
+    spotted.
+    """
+    LINE_PAIRS = 'line_pairs'
+    LABEL_COLON_VALUE = 'label_colon_value'
+
+    def __init__(self, layout: str, fields: Dict[str, Tuple[str, str]], name: str = None):
+        """
+        :param layout: LINE_PAIRS or LABEL_COLON_VALUE.
+        :param fields: the lowercase label -> (the column, the regex with one group that extracts the value).
+        :param name: a name used in the report of the unknown labels.
+        """
+        if layout not in (self.LINE_PAIRS, self.LABEL_COLON_VALUE):
+            raise ValueError(f"Unknown data box layout: {layout}")
+
+        self.layout = layout
+        self.name = name or layout
+        self.fields = {label: (column, re.compile(regex)) for label, (column, regex) in fields.items()}
+        self.columns = [column for column, _ in self.fields.values()]
+        self.unknown_labels = Counter()
+        _parsers.append(self)
+
+    def parse(self, text: Union[str, None]) -> Dict[str, Union[str, None]]:
+        """
+        :param text: the text of the data box; None, if there is no data box on the page.
+        :return: a value (or None) for every column of the parser. The first occurrence of a label wins.
+        """
+        parsed = dict.fromkeys(self.columns)
+        if not text:
+            return parsed
+
+        tokens = self.tokenize(text)
+        for label, (column, regex) in self.fields.items():
+            value = tokens.get(label)
+            if value is not None:
+                found_value = regex.match(value)
+                if found_value:
+                    parsed[column] = found_value.group(1)
+
+        for label in tokens:
+            if label not in self.fields:
+                self.unknown_labels[label] += 1
+        return parsed
+
+    def tokenize(self, text: str) -> Dict[str, Union[str, None]]:
+        """
+        :return: the label -> the value of every row of the data box. The first occurrence of a label wins.
+        """
+        lines = text.lower().split('\n')
+
+        if self.layout == self.LINE_PAIRS:
+            return self._tokenize_line_pairs(lines)
+
+        return dict(line.split(': ', 1) for line in reversed(lines) if ': ' in line)
+
+    def _tokenize_line_pairs(self, lines: List[str]) -> Dict[str, Union[str, None]]:
+        """
+        The pairs are anchored on the known labels, not on the line numbers - a header line, a label without a value or
+        a value split into more lines would shift all the following pairs otherwise. A line followed by a known label
+        has no value (None), e.g. a header of the box or a label without a value.
+        """
+        tokens = {}
+        last_position = len(lines) - 1
+        position = 0
+        while position < last_position:
+            label, value = lines[position], lines[position + 1]
+            if value in self.fields:
+                value = None
+                position += 1
+            else:
+                position += 2
+
+            if label not in tokens:
+                tokens[label] = value
+
+        if position == last_position:
+            tokens.setdefault(lines[position], None)
+
+        return tokens
+
+    @staticmethod
+    def report_unknown_labels(top: int = 10) -> None:
+        for parser in _parsers:
+            if not parser.unknown_labels:
+                continue
+
+            labels = ', '.join(f"'{label}' ({count})" for label, count in parser.unknown_labels.most_common(top))
+            print(f"Unknown labels in the data box '{parser.name}': {labels}")
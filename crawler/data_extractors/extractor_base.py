@@ -1,30 +1,100 @@
-from typing import Union
+from typing import Union, Dict, Callable, Tuple
 
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from glob import glob
+import os
 import re
+import time
 
 from selenium.webdriver.remote.webelement import WebElement
 from selenium.webdriver.chrome.webdriver import WebDriver
+from selenium.webdriver.common.by import By
 
+from crawler.common.html_page import HtmlPage, HtmlElement
+from crawler.common.page_store import PageStore
+from crawler.common.record_batch import RecordBatch
 from crawler.common.selenium_common_methods import SeleniumCommonMethods
+from crawler.data_extractors.data_box_parser import DataBoxParser
 
 
 class ExtractorBase(SeleniumCommonMethods):
-    def __init__(self, driver: WebDriver, scraped_records: dict, page_to_extract_url: str):
+    READY_XPATH: str
+
+    def __init__(self, driver: Union[WebDriver, HtmlPage], scraped_records: RecordBatch, page_to_extract_url: str):
         self.driver = driver
         self.scraped_records = scraped_records
         self.page_to_extract_url = page_to_extract_url
 
-    def read_data_box(self, regexes: dict, data_box: Union[WebElement, None]) -> None:
-        if data_box is None:
-            for colname in regexes.keys():
-                self.scraped_records[colname].append(None)
-            return
+    def wait_until_offer_ready(self) -> None:
+        """The data box is rendered last - once it is present, the rest of the offer can be read right away."""
+        if self.wait_for_element(By.XPATH, self.READY_XPATH) is None:
+            print(f"The offer page has not been loaded in {self.WAIT_TIMEOUT}s: {self.page_to_extract_url}")
+
+    @classmethod
+    def replay(cls, mirrors_dir: str, workers: int = None) -> RecordBatch:
+        """
+        Run the extraction over the webpages stored in a directory (e.g. the ones saved with the 'save_webpage' method)
+        instead of the live portal. The pages are parsed without any browser, in a pool of processes.
+
+        :param mirrors_dir: a directory that is searched (recursively) for the '.html' files.
+        :param workers: a number of the processes; defaults to the number of the CPUs.
+        :return: the scraped records - a record batch with the same columns as the crawler fills.
+        """
+        paths = sorted(glob(os.path.join(mirrors_dir, '**', '*.html'), recursive=True))
+        return cls._replay(partial(_replay_webpage, cls), paths, source_name=mirrors_dir, workers=workers)
+
+    @classmethod
+    def replay_page_store(cls, store_dir: str, workers: int = None) -> RecordBatch:
+        """
+        Run the extraction over the latest version of every page kept in the page store (see the 'PageStore' class).
+        Only the index entries are sent to the workers - every worker reads & decompresses the bodies on its own. The
+        entries are ordered by their location, so a worker reads a contiguous slice of a segment.
+
+        :param store_dir: the root directory of the page store.
+        :param workers: a number of the processes; defaults to the number of the CPUs.
+        :return: the scraped records - a record batch with the same columns as the crawler fills.
+        """
+        pages = list(PageStore(store_dir).iter_latest_entries())
+        return cls._replay(partial(_replay_store_entry, cls, store_dir), pages, source_name=store_dir, workers=workers)
+
+    @staticmethod
+    def _replay(replay_func: Callable, sources: list, source_name: str, workers: int = None) -> RecordBatch:
+        scraped_records = RecordBatch()
+        workers = workers or os.cpu_count()
+        chunksize = max(1, len(sources) // (4 * workers))
+
+        start_time = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for records in executor.map(replay_func, sources, chunksize=chunksize):
+                scraped_records.extend(records)
+
+        elapsed = time.perf_counter() - start_time
+        print(f"Replayed {len(sources)} webpages from {source_name} in {elapsed:.2f}s "
+              f"({len(sources) / max(elapsed, 1e-9):.1f} pages/s)")
+        return scraped_records
+
+    @staticmethod
+    def read_data_box(parser: DataBoxParser, data_box: Union[WebElement, HtmlElement, None]) -> Dict[str, str]:
+        return parser.parse(data_box.text if data_box is not None else None)
+
+
+def _replay_webpage(extractor_class: type, path: str) -> RecordBatch:
+    with open(path, 'r', encoding='utf-8') as f:
+        page_source = f.read()
+
+    saved_from = re.match(r'<!-- saved from url=(\S+) -->', page_source)
+    url = saved_from.group(1) if saved_from else path
+    return _replay_stored_page(extractor_class, (url, page_source))
+
+
+def _replay_store_entry(extractor_class: type, store_dir: str, page: Tuple[str, dict]) -> RecordBatch:
+    url, entry = page
+    return _replay_stored_page(extractor_class, (url, PageStore.read_body(store_dir, entry)))
+
 
-        data_box = data_box.text.lower()
-        for colname, regex in regexes.items():
-            found_value = re.search(regex, data_box)
+def _replay_stored_page(extractor_class: type, page: Tuple[str, str]) -> RecordBatch:
+    url, page_source = page
 
-            if found_value:
-                self.scraped_records[colname].append(found_value.group(1))
-            else:
-                self.scraped_records[colname].append(None)
+    extractor = extractor_class(HtmlPage(page_source, url=url), RecordBatch(), page_to_extract_url=url)
+    return extractor.extract()
@@ -1,14 +1,27 @@
-from typing import Dict
-
 from selenium.webdriver.common.by import By
 
 from _common.database_communicator.tables import DataStagingCols
+from crawler.common.record_batch import RecordBatch
+from crawler.data_extractors.data_box_parser import DataBoxParser
 from crawler.data_extractors.extractor_base import ExtractorBase
 
 
 class DataExtractorOTODOM(ExtractorBase):
-
-    def extract(self) -> Dict[DataStagingCols, str]:
+    READY_XPATH = "//strong[@data-cy='adPageHeaderPrice']"
+    UPPER_DATA_BOX_PARSER = DataBoxParser(DataBoxParser.LINE_PAIRS, name='otodom upper', fields={
+        'piętro': (DataStagingCols.FLOOR, '(.*)'),
+        'powierzchnia': (DataStagingCols.SIZE, '([0-9]+[,]?[0-9]+)'),
+        'liczba pokoi': (DataStagingCols.ROOMS, '([0-9]+)$'),
+        'stan wykończenia': (DataStagingCols.PROPERTY_CONDITION, '(.*)')
+    })
+    LOWER_DATA_BOX_PARSER = DataBoxParser(DataBoxParser.LINE_PAIRS, name='otodom lower', fields={
+        'rynek': (DataStagingCols.STATUS, '(.*)'),
+        'rok budowy': (DataStagingCols.YEAR_BUILT, '(.*)'),
+        'rodzaj zabudowy': (DataStagingCols.PROPERTY_TYPE, '(.*)')
+    })
+
+    def extract(self) -> RecordBatch:
+        self.wait_until_offer_ready()
         self.click_button_with_text(text='Akceptuję')  # needed when entering the otodom page from olx page
         self.click_button_with_text(text='Pokaż więcej')
 
@@ -20,27 +33,18 @@ class DataExtractorOTODOM(ExtractorBase):
             image_url = image_url.get_attribute('src')
 
         upper_data_box = self._find_element(By.XPATH, "//div[@data-testid='ad.top-information.table']")
-        regexes_for_reading_upper_data_box = {
-            DataStagingCols.FLOOR: 'piętro\\n(.*)\\n',
-            DataStagingCols.SIZE: 'powierzchnia\\n([0-9]+[,]?[0-9]+)',
-            DataStagingCols.ROOMS: 'liczba pokoi\\n([0-9]+)\\n',
-            DataStagingCols.PROPERTY_CONDITION: 'stan wykończenia\\n(.*)\\n'
-        }
-
         lower_data_box = self._find_element(By.XPATH, "//div[@data-testid='ad.additional-information.table']")
-        regexes_for_reading_lower_data_box = {
-            DataStagingCols.STATUS: 'rynek\\n(.*)\\n',
-            DataStagingCols.YEAR_BUILT: 'rok budowy\\n(.*)\\n',
-            DataStagingCols.PROPERTY_TYPE: 'rodzaj zabudowy\\n(.*)\\n'
-        }
 
         price, location, desc = self.extract_text_from_elements([price, location, desc])
-        self.read_data_box(regexes=regexes_for_reading_upper_data_box, data_box=upper_data_box)
-        self.read_data_box(regexes=regexes_for_reading_lower_data_box, data_box=lower_data_box)
-        self.scraped_records[DataStagingCols.URL].append(self.page_to_extract_url)
-        self.scraped_records[DataStagingCols.PRICE].append(price)
-        self.scraped_records[DataStagingCols.LOCATION].append(location)
-        self.scraped_records[DataStagingCols.DESC].append(desc)
-        self.scraped_records[DataStagingCols.IMAGE_URL].append(image_url)
+        record = {
+            DataStagingCols.URL: self.page_to_extract_url,
+            DataStagingCols.PRICE: price,
+            DataStagingCols.LOCATION: location,
+            DataStagingCols.DESC: desc,
+            DataStagingCols.IMAGE_URL: image_url
+        }
+        record.update(self.read_data_box(parser=self.UPPER_DATA_BOX_PARSER, data_box=upper_data_box))
+        record.update(self.read_data_box(parser=self.LOWER_DATA_BOX_PARSER, data_box=lower_data_box))
+        self.scraped_records.append(record)
 
         return self.scraped_records
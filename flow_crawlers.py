@@ -1,43 +1,70 @@
 from prefect.context import FlowRunContext
 from prefect import flow, task
 
+from crawler.crawler_base import CrawlerBase
 from crawler.crawler_otodom import CrawlerOTODOM
 from crawler.crawler_olx import CrawlerOLX
+from crawler.data_cleaner.background_cleaner import BackgroundCleaner
 from crawler.data_cleaner.data_cleaner import DataCleaner
 from _common.email_sender.send_finish_message import send_finish_message
 
 
+# Before deploying the version with the price history, recompute the stored row hashes once - otherwise every record
+# whose hash was made in a batch without a missing floor is saved as a change:
+#     python -m crawler.data_cleaner.row_hash_migration
+
+
+def get_flow_name() -> str:
+    return FlowRunContext.get().flow_run.dict().get('name')
+
+
+def get_flow_run_id() -> str:
+    return str(FlowRunContext.get().flow_run.id)
+
+
+def clean_in_background(crawler: CrawlerBase) -> BackgroundCleaner:
+    # The saved records are cleaned while the crawler goes on, the last clean_data run only picks up the rest
+    background_cleaner = BackgroundCleaner(DataCleaner(flow_name=get_flow_name()))
+    crawler.on_batch_saved = background_cleaner.notify
+    return background_cleaner
+
+
 @task(name='scrape_otodom_data', log_prints=True)
 def scrape_otodom_data():
     crawler = CrawlerOTODOM()
+    crawler.flow_run_id = get_flow_run_id()
+    background_cleaner = clean_in_background(crawler)
     try:
         crawler.scrape()
-    except Exception as e:
-        crawler.kill_webdriver_processes()
-        raise e
-    else:
-        crawler.kill_webdriver_processes()
+    finally:
+        background_cleaner.stop()
+        crawler.quit_driver()
+        crawler.report_driver_stats()
+        crawler.report_connection_stats()
 
 
 @task(name='scrape_olx_data', log_prints=True)
 def scrape_olx_data():
     crawler = CrawlerOLX()
+    crawler.flow_run_id = get_flow_run_id()
+    background_cleaner = clean_in_background(crawler)
     try:
         crawler.scrape()
-    except Exception as e:
-        crawler.kill_webdriver_processes()
-        raise e
-    else:
-        crawler.kill_webdriver_processes()
+    finally:
+        background_cleaner.stop()
+        crawler.quit_driver()
+        crawler.report_driver_stats()
+        crawler.report_connection_stats()
 
 
 @task(name='clean_data', log_prints=True)
 def clean_data():
-    flow_name = FlowRunContext.get().flow_run.dict().get('name')
+    flow_name = get_flow_name()
 
     print(f'The flow name is: {flow_name}')
     cleaner = DataCleaner(flow_name=flow_name)
     cleaner.clean_and_save_data()
+    cleaner.report_connection_stats()
 
 
 @flow(
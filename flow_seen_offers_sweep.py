@@ -0,0 +1,26 @@
+from prefect import flow, task
+
+from crawler.crawler_otodom import CrawlerOTODOM
+from _common.email_sender.send_finish_message import send_finish_message
+
+
+@task(name='sweep_otodom_seen_offers', log_prints=True)
+def sweep_otodom_seen_offers():
+    crawler = CrawlerOTODOM()
+    try:
+        crawler.sweep_seen_offers()
+    finally:
+        crawler.quit_driver()
+        crawler.report_driver_stats()
+
+
+@flow(
+    name='sweep_seen_offers', log_prints=True,
+    on_completion=[send_finish_message], on_failure=[send_finish_message]
+)
+def sweep_seen_offers():
+    sweep_otodom_seen_offers()
+
+
+if __name__ == "__main__":
+    sweep_seen_offers.serve(name="2026-10-18", cron='0 3 * * *')
@@ -12,9 +12,14 @@ CREATE TABLE IF NOT EXISTS data_staging
     property_condition TEXT,
     "location" TEXT,
     "desc" TEXT,
-    image_url TEXT
+    image_url TEXT,
+    ingest_id BIGSERIAL
 );
 
+-- The staging tables created before the ingest ids were added
+ALTER TABLE data_staging ADD COLUMN IF NOT EXISTS ingest_id BIGSERIAL;
+ALTER TABLE data_staging DROP COLUMN IF EXISTS batch_id;
+CREATE INDEX IF NOT EXISTS data_staging_ingest_id_idx ON data_staging (ingest_id);
 
 CREATE TABLE IF NOT EXISTS data_main
 (
@@ -41,6 +46,25 @@ CREATE TABLE IF NOT EXISTS data_main
     CONSTRAINT ck_property_condition CHECK (property_condition IN ('do zamieszkania', 'do wykończenia', 'do remontu', 'stan surowy zamknięty', 'stan surowy otwarty'))
 );
 
+-- The previous versions of the records of 'data_main', saved when the 'row_hash' of a record changes
+CREATE TABLE IF NOT EXISTS data_price_history
+(
+    id BIGSERIAL PRIMARY KEY,
+    url TEXT NOT NULL,
+    price DECIMAL,
+    currency VARCHAR(10),
+    rooms INT,
+    "floor" INT,
+    "location" VARCHAR(30),
+    row_hash VARCHAR(64),
+    last_time_seen DATE,
+    changed_date DATE,
+    run_id TEXT,
+    FOREIGN KEY (url) REFERENCES data_main(url) ON DELETE CASCADE
+);
+
+CREATE INDEX IF NOT EXISTS data_price_history_url_idx ON data_price_history (url);
+
 CREATE TABLE IF NOT EXISTS temp_table
 (
     url TEXT PRIMARY KEY,
@@ -88,11 +112,26 @@ GRANT ALL ON data_staging TO "Zosia";
 GRANT ALL ON data_staging TO "Artur";
 GRANT ALL ON data_staging TO "Dominika";
 
+GRANT ALL ON SEQUENCE data_staging_ingest_id_seq TO "Kamil";
+GRANT ALL ON SEQUENCE data_staging_ingest_id_seq TO "Zosia";
+GRANT ALL ON SEQUENCE data_staging_ingest_id_seq TO "Artur";
+GRANT ALL ON SEQUENCE data_staging_ingest_id_seq TO "Dominika";
+
 GRANT ALL ON data_main TO "Kamil";
 GRANT ALL ON data_main TO "Zosia";
 GRANT ALL ON data_main TO "Artur";
 GRANT ALL ON data_main TO "Dominika";
 
+GRANT ALL ON data_price_history TO "Kamil";
+GRANT ALL ON data_price_history TO "Zosia";
+GRANT ALL ON data_price_history TO "Artur";
+GRANT ALL ON data_price_history TO "Dominika";
+
+GRANT ALL ON SEQUENCE data_price_history_id_seq TO "Kamil";
+GRANT ALL ON SEQUENCE data_price_history_id_seq TO "Zosia";
+GRANT ALL ON SEQUENCE data_price_history_id_seq TO "Artur";
+GRANT ALL ON SEQUENCE data_price_history_id_seq TO "Dominika";
+
 GRANT ALL ON temp_table TO "Kamil";
 GRANT ALL ON temp_table TO "Zosia";
 GRANT ALL ON temp_table TO "Artur";